@@ -2,10 +2,16 @@
 Post editing actions (shorten, expand, emojis, hashtags, etc.)
 Real implementation with Ollama → Gemini fallback
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Tuple
 from app.services.llm_manager import llm_manager
+from app.services.scheduler import PRIORITY_INTERACTIVE
+from app.services.prompt_budget import add_custom_instructions, estimate_tokens, fit_output_limit, rewrite_token_limit
+from app.services.prompt_registry import PromptTemplate, prompt_registry
+from app.services.chat_sessions import PREVIOUS_POST, chat_sessions
+from app.api.streaming import sse_response
+from app.auth.routes import get_requester_id
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,13 +29,11 @@ class EditResponse(BaseModel):
 # Common system prompt for all editing actions
 EDITOR_SYSTEM = "You are an expert LinkedIn content editor. Preserve the core message while applying the requested changes. Return ONLY the edited content, no explanations."
 
-@router.post("/edit/shorten", response_model=EditResponse)
-async def shorten_content(request: EditRequest):
-    """Make content shorter and more concise"""
-    try:
-        prompt = f"""Make this LinkedIn post shorter and more concise while keeping the core message:
+# Prompt per edit action, keyed by the URL slug
+EDIT_PROMPTS = {
+    "shorten": """Make this LinkedIn post shorter and more concise while keeping the core message:
 
-{request.content}
+{content}
 
 Requirements:
 - Remove unnecessary words and phrases
@@ -38,32 +42,11 @@ Requirements:
 - Preserve formatting (line breaks, emojis)
 - Aim for 30-40% reduction in length
 
-Return ONLY the shortened post."""
-
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
-
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
-        
-        if not content:
-            raise HTTPException(status_code=503, detail="Edit failed")
-        
-        logger.info(f"✓ Shortened content using {provider}")
-        return EditResponse(success=True, content=content.strip(), provider=provider)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Shorten error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+Return ONLY the shortened post.""",
 
-@router.post("/edit/expand", response_model=EditResponse)
-async def expand_content(request: EditRequest):
-    """Make content longer with more details"""
-    try:
-        prompt = f"""Expand this LinkedIn post with more details, examples, and insights:
+    "expand": """Expand this LinkedIn post with more details, examples, and insights:
 
-{request.content}
+{content}
 
 Requirements:
 - Add relevant examples or anecdotes
@@ -73,32 +56,11 @@ Requirements:
 - Preserve formatting
 - Add 40-60% more content
 
-Return ONLY the expanded post."""
+Return ONLY the expanded post.""",
 
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
+    "add-emojis": """Add 3-6 relevant emojis to this LinkedIn post strategically:
 
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
-        
-        if not content:
-            raise HTTPException(status_code=503, detail="Edit failed")
-        
-        logger.info(f"✓ Expanded content using {provider}")
-        return EditResponse(success=True, content=content.strip(), provider=provider)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Expand error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/edit/add-emojis", response_model=EditResponse)
-async def add_emojis(request: EditRequest):
-    """Add relevant emojis to content"""
-    try:
-        prompt = f"""Add 3-6 relevant emojis to this LinkedIn post strategically:
-
-{request.content}
+{content}
 
 Requirements:
 - Place emojis where they enhance meaning
@@ -107,32 +69,11 @@ Requirements:
 - Keep the text unchanged except for emoji additions
 - Common placements: start of lines, end of sentences, bullet points
 
-Return ONLY the post with emojis added."""
-
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
-
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
-        
-        if not content:
-            raise HTTPException(status_code=503, detail="Edit failed")
-        
-        logger.info(f"✓ Added emojis using {provider}")
-        return EditResponse(success=True, content=content.strip(), provider=provider)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Add emojis error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+Return ONLY the post with emojis added.""",
 
-@router.post("/edit/add-hashtags", response_model=EditResponse)
-async def add_hashtags(request: EditRequest):
-    """Add relevant hashtags to content"""
-    try:
-        prompt = f"""Add 3-5 relevant hashtags at the end of this LinkedIn post:
+    "add-hashtags": """Add 3-5 relevant hashtags at the end of this LinkedIn post:
 
-{request.content}
+{content}
 
 Requirements:
 - Choose hashtags relevant to the content
@@ -141,32 +82,11 @@ Requirements:
 - Format: #HashtagName (no spaces)
 - Include mix of broad and specific hashtags
 
-Return ONLY the post with hashtags added at the end."""
+Return ONLY the post with hashtags added at the end.""",
 
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
+    "improve": """Improve the writing quality of this LinkedIn post:
 
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
-        
-        if not content:
-            raise HTTPException(status_code=503, detail="Edit failed")
-        
-        logger.info(f"✓ Added hashtags using {provider}")
-        return EditResponse(success=True, content=content.strip(), provider=provider)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Add hashtags error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/edit/improve", response_model=EditResponse)
-async def improve_writing(request: EditRequest):
-    """Improve overall writing quality"""
-    try:
-        prompt = f"""Improve the writing quality of this LinkedIn post:
-
-{request.content}
+{content}
 
 Requirements:
 - Enhance clarity and impact
@@ -176,32 +96,11 @@ Requirements:
 - Maintain the core message and tone
 - Preserve formatting
 
-Return ONLY the improved post."""
+Return ONLY the improved post.""",
 
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
+    "rephrase": """Rephrase this LinkedIn post for better clarity and impact:
 
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
-        
-        if not content:
-            raise HTTPException(status_code=503, detail="Edit failed")
-        
-        logger.info(f"✓ Improved content using {provider}")
-        return EditResponse(success=True, content=content.strip(), provider=provider)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Improve error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/edit/rephrase", response_model=EditResponse)
-async def rephrase_content(request: EditRequest):
-    """Rephrase for clarity and impact"""
-    try:
-        prompt = f"""Rephrase this LinkedIn post for better clarity and impact:
-
-{request.content}
+{content}
 
 Requirements:
 - Keep the same meaning
@@ -210,32 +109,11 @@ Requirements:
 - Maintain professional tone
 - Preserve formatting
 
-Return ONLY the rephrased post."""
+Return ONLY the rephrased post.""",
 
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
+    "fix-grammar": """Fix any spelling and grammar errors in this LinkedIn post:
 
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
-        
-        if not content:
-            raise HTTPException(status_code=503, detail="Edit failed")
-        
-        logger.info(f"✓ Rephrased content using {provider}")
-        return EditResponse(success=True, content=content.strip(), provider=provider)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Rephrase error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/edit/fix-grammar", response_model=EditResponse)
-async def fix_grammar(request: EditRequest):
-    """Fix spelling and grammar errors"""
-    try:
-        prompt = f"""Fix any spelling and grammar errors in this LinkedIn post:
-
-{request.content}
+{content}
 
 Requirements:
 - Correct spelling mistakes
@@ -244,32 +122,11 @@ Requirements:
 - Keep the text otherwise unchanged
 - Preserve formatting and style
 
-Return ONLY the corrected post."""
+Return ONLY the corrected post.""",
 
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
+    "simplify": """Simplify the language in this LinkedIn post for broader accessibility:
 
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
-        
-        if not content:
-            raise HTTPException(status_code=503, detail="Edit failed")
-        
-        logger.info(f"✓ Fixed grammar using {provider}")
-        return EditResponse(success=True, content=content.strip(), provider=provider)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Fix grammar error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/edit/simplify", response_model=EditResponse)
-async def simplify_language(request: EditRequest):
-    """Simplify language for broader accessibility"""
-    try:
-        prompt = f"""Simplify the language in this LinkedIn post for broader accessibility:
-
-{request.content}
+{content}
 
 Requirements:
 - Use simpler, more common words
@@ -280,20 +137,160 @@ Requirements:
 - Preserve formatting
 
 Return ONLY the simplified post."""
-
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional: {request.custom_instructions}"
-
-        content, provider = await llm_manager.generate(prompt=prompt, system=EDITOR_SYSTEM)
+}
+
+EDIT_TEMPLATES = {
+    action: prompt_registry.register(f"edit.{action}", text, ("content",), system=EDITOR_SYSTEM)
+    for action, text in EDIT_PROMPTS.items()
+}
+
+# Mechanical edits that leave the wording alone are safe to serve from the
+# response cache; creative rewrites always go to the model
+CACHEABLE_EDITS = {"fix-grammar", "add-emojis", "add-hashtags"}
+
+# Expected output length relative to the input, plus a fixed allowance for
+# added emojis/hashtags, used for the output token limit
+EDIT_OUTPUT_GROWTH = {"expand": 1.7}
+DEFAULT_EDIT_OUTPUT_GROWTH = 1.1
+EDIT_OUTPUT_SLACK = 200
+
+def edit_max_tokens(action: str, request: EditRequest) -> int:
+    """
+    Output token limit for an edit, from the length of the content and
+    capped at what the context leaves after the prompt. The content is never
+    trimmed, so content whose own length does not fit is rejected with a 413.
+    """
+    growth = EDIT_OUTPUT_GROWTH.get(action, DEFAULT_EDIT_OUTPUT_GROWTH)
+    template = EDIT_TEMPLATES[action]
+    return fit_output_limit(
+        f"{template.system}\n\n{template.render(content=request.content)}",
+        rewrite_token_limit(request.content, growth, EDIT_OUTPUT_SLACK),
+        estimate_tokens(request.content)
+    )
+
+def build_edit_prompt(
+    action: str,
+    request: EditRequest,
+    max_tokens: int,
+    content: Optional[str] = None
+) -> Tuple[str, PromptTemplate]:
+    """
+    Build the edit prompt for an action, appending any custom instructions
+    (trimmed to the prompt budget; the content itself is never trimmed).
+    content replaces the post text, e.g. to refer to an earlier chat turn.
+    """
+    prompt, template = prompt_registry.render(
+        EDIT_TEMPLATES[action].name,
+        content=request.content if content is None else content
+    )
+    prompt = add_custom_instructions(
+        template.system, prompt, request.custom_instructions, max_tokens, label="Additional"
+    )
+    return prompt, template
+
+async def _run_edit(
+    action: str,
+    request: EditRequest,
+    requester: str,
+    done_message: str,
+    error_label: str
+) -> EditResponse:
+    try:
+        max_tokens = edit_max_tokens(action, request)
+        prompt, template = build_edit_prompt(action, request, max_tokens)
+        
+        # Editing the post Ollama just wrote: continue that chat so the
+        # system prompt and post are reused from its KV cache
+        followup, _ = build_edit_prompt(action, request, max_tokens, content=PREVIOUS_POST)
+        messages = chat_sessions.continuation(requester, request.content, template.system, followup, max_tokens)
+        
+        content, provider, fresh = await llm_manager.generate(
+            prompt=prompt,
+            system=template.system,
+            cache=action in CACHEABLE_EDITS,
+            hedge=True,
+            priority=PRIORITY_INTERACTIVE,
+            user_id=requester,
+            max_tokens=max_tokens,
+            prompt_version=template.version,
+            ollama_messages=messages
+        )
         
         if not content:
             raise HTTPException(status_code=503, detail="Edit failed")
         
-        logger.info(f"✓ Simplified content using {provider}")
+        # Cached or shared answers never went through this chat on Ollama
+        if fresh:
+            chat_sessions.record(requester, provider, template.system, prompt, content.strip(), messages)
+        
+        logger.info(f"✓ {done_message} using {provider}")
         return EditResponse(success=True, content=content.strip(), provider=provider)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Simplify error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.error(f"{error_label} error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/edit/shorten", response_model=EditResponse)
+async def shorten_content(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Make content shorter and more concise"""
+    return await _run_edit("shorten", request, requester, "Shortened content", "Shorten")
+
+@router.post("/edit/expand", response_model=EditResponse)
+async def expand_content(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Make content longer with more details"""
+    return await _run_edit("expand", request, requester, "Expanded content", "Expand")
+
+@router.post("/edit/add-emojis", response_model=EditResponse)
+async def add_emojis(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Add relevant emojis to content"""
+    return await _run_edit("add-emojis", request, requester, "Added emojis", "Add emojis")
+
+@router.post("/edit/add-hashtags", response_model=EditResponse)
+async def add_hashtags(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Add relevant hashtags to content"""
+    return await _run_edit("add-hashtags", request, requester, "Added hashtags", "Add hashtags")
+
+@router.post("/edit/improve", response_model=EditResponse)
+async def improve_writing(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Improve overall writing quality"""
+    return await _run_edit("improve", request, requester, "Improved content", "Improve")
+
+@router.post("/edit/rephrase", response_model=EditResponse)
+async def rephrase_content(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Rephrase for clarity and impact"""
+    return await _run_edit("rephrase", request, requester, "Rephrased content", "Rephrase")
+
+@router.post("/edit/fix-grammar", response_model=EditResponse)
+async def fix_grammar(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Fix spelling and grammar errors"""
+    return await _run_edit("fix-grammar", request, requester, "Fixed grammar", "Fix grammar")
+
+@router.post("/edit/simplify", response_model=EditResponse)
+async def simplify_language(request: EditRequest, requester: str = Depends(get_requester_id)):
+    """Simplify language for broader accessibility"""
+    return await _run_edit("simplify", request, requester, "Simplified content", "Simplify")
+
+@router.post("/edit/{action}/stream")
+async def stream_edit(
+    action: str,
+    request: EditRequest,
+    requester: str = Depends(get_requester_id)
+):
+    """Run any edit action, streaming tokens back as Server-Sent Events"""
+    if action not in EDIT_TEMPLATES:
+        raise HTTPException(status_code=404, detail=f"Unknown edit action: {action}")
+    
+    max_tokens = edit_max_tokens(action, request)
+    prompt, template = build_edit_prompt(action, request, max_tokens)
+    return await sse_response(
+        llm_manager.generate_stream(
+            prompt=prompt,
+            system=template.system,
+            priority=PRIORITY_INTERACTIVE,
+            user_id=requester,
+            max_tokens=max_tokens
+        ),
+        error_detail="Edit failed"
+    )
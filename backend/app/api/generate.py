@@ -1,43 +1,63 @@
 """
 API endpoints for post generation
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.schemas.post_schemas import GenerateRequest, GenerateResponse, ErrorResponse
 from app.services.llm_manager import llm_manager
-from app.services.templates import get_template
+from app.services.templates import render_template
+from app.services.scheduler import PRIORITY_GENERATION
+from app.services.prompt_budget import POST_MAX_TOKENS, add_custom_instructions
+from app.api.streaming import sse_response
+from app.auth.routes import get_requester_id
+from app.services.prompt_registry import prompt_registry
+from app.services.chat_sessions import chat_sessions
+from app.core.security import password_pool
+from app.gemini_client import fallback_image_cache
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+GENERATION_FAILED_DETAIL = "AI generation failed. Please check if Ollama is running or configure Gemini API key."
+
+def _build_prompt(request: GenerateRequest) -> tuple[str, str]:
+    """Build (system, prompt) for a generation request"""
+    # Render the precompiled template
+    prompt, template = render_template(request.template or "story", request.topic)
+    
+    # Add custom instructions if provided (trimmed to the prompt budget)
+    prompt = add_custom_instructions(template.system, prompt, request.custom_instructions, POST_MAX_TOKENS)
+    
+    return template.system, prompt
+
 @router.post("/generate", response_model=GenerateResponse)
-async def generate_post(request: GenerateRequest):
+async def generate_post(request: GenerateRequest, requester: str = Depends(get_requester_id)):
     """
     Generate a LinkedIn post from a topic using AI
     """
     try:
-        # Get template
-        template_data = get_template(request.template or "story")
-        
-        # Build prompt
-        prompt = template_data["template"].format(topic=request.topic)
-        
-        # Add custom instructions if provided
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional instructions: {request.custom_instructions}"
+        system, prompt = _build_prompt(request)
         
         # Generate with LLM
-        result, provider = await llm_manager.generate(
+        result, provider, fresh = await llm_manager.generate(
             prompt=prompt,
-            system=template_data["system"]
+            system=system,
+            priority=PRIORITY_GENERATION,
+            user_id=requester,
+            max_tokens=POST_MAX_TOKENS
         )
         
         if not result:
             raise HTTPException(
                 status_code=503,
-                detail="AI generation failed. Please check if Ollama is running or configure Gemini API key."
+                detail=GENERATION_FAILED_DETAIL
             )
         
+        # Follow-up edits of this post can continue the conversation, if
+        # this request was the one that produced it
+        if fresh:
+            chat_sessions.record(requester, provider, system, prompt, result.strip())
+        
         return GenerateResponse(
             success=True,
             post=result,
@@ -54,6 +74,23 @@ async def generate_post(request: GenerateRequest):
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post("/generate/stream")
+async def generate_post_stream(request: GenerateRequest, requester: str = Depends(get_requester_id)):
+    """
+    Generate a LinkedIn post and stream tokens back as Server-Sent Events
+    """
+    system, prompt = _build_prompt(request)
+    return await sse_response(
+        llm_manager.generate_stream(
+            prompt=prompt,
+            system=system,
+            priority=PRIORITY_GENERATION,
+            user_id=requester,
+            max_tokens=POST_MAX_TOKENS
+        ),
+        error_detail=GENERATION_FAILED_DETAIL
+    )
+
 @router.get("/templates")
 async def get_templates():
     """
@@ -73,5 +110,11 @@ async def get_status():
     availability = await llm_manager.check_availability()
     return {
         "success": True,
-        "providers": availability
+        "providers": availability,
+        "cache": llm_manager.cache.stats(),
+        "in_flight": llm_manager.in_flight.stats(),
+        "fallback_images": fallback_image_cache.stats(),
+        "prompts": prompt_registry.stats(),
+        "chat_sessions": chat_sessions.stats(),
+        "password_hashing": password_pool.stats()
     }
\ No newline at end of file
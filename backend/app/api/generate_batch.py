@@ -0,0 +1,206 @@
+"""
+Batch post generation endpoint
+Runs many topic generations at bounded concurrency and streams each result
+back as NDJSON as soon as it finishes. Finished items are recorded per job
+so an interrupted batch can be resumed with the same job_id. The job file
+starts with a hash of the items, so a job_id is only resumed for the same items.
+A job file is deleted once every item has succeeded; files of abandoned jobs
+expire after BATCH_JOB_TTL seconds (checked on startup).
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.config import settings
+from app.services.llm_manager import llm_manager
+from app.services.scheduler import PRIORITY_BATCH
+from app.services.prompt_budget import POST_MAX_TOKENS
+from app.api.generate_topic import TopicGenerateRequest, build_topic_prompt
+from app.auth.routes import get_requester_id
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+JOB_ID_PATTERN = re.compile(r"^[a-f0-9]{32}$")
+
+class BatchGenerateRequest(BaseModel):
+    items: List[TopicGenerateRequest] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+    job_id: Optional[str] = Field(None, description="Resume a previous batch; finished items are replayed, not regenerated")
+    concurrency: Optional[int] = Field(None, ge=1, le=settings.BATCH_MAX_CONCURRENCY, description="Parallel generations")
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(settings.BATCH_JOBS_DIR, f"{job_id}.jsonl")
+
+def _items_hash(items: List[TopicGenerateRequest]) -> str:
+    encoded = json.dumps([item.model_dump() for item in items], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def _load_finished(job_id: str, items_hash: str) -> Optional[dict]:
+    """
+    Read successfully finished items of a job, keyed by index. Starts the
+    job file if there is none; returns None if the job was created for
+    different items.
+    """
+    finished = {}
+    path = _job_path(job_id)
+    if not os.path.exists(path):
+        _append_result(job_id, {"type": "job", "items_hash": items_hash})
+        return finished
+
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline()
+        try:
+            if json.loads(header).get("items_hash") != items_hash:
+                return None
+        except json.JSONDecodeError:
+            return None
+
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written last line after a crash
+            if item.get("success"):
+                finished[item["index"]] = item
+    return finished
+
+def _append_result(job_id: str, item: dict):
+    with open(_job_path(job_id), "a", encoding="utf-8") as f:
+        f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+def _delete_job(job_id: str):
+    try:
+        os.remove(_job_path(job_id))
+    except FileNotFoundError:
+        pass
+
+def expire_batch_jobs(max_age: int = settings.BATCH_JOB_TTL) -> int:
+    """Delete job files not written to for max_age seconds; returns the number deleted"""
+    if not os.path.isdir(settings.BATCH_JOBS_DIR):
+        return 0
+
+    cutoff = time.time() - max_age
+    expired = 0
+    for name in os.listdir(settings.BATCH_JOBS_DIR):
+        path = os.path.join(settings.BATCH_JOBS_DIR, name)
+        try:
+            if name.endswith(".jsonl") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                expired += 1
+        except FileNotFoundError:
+            continue
+    if expired:
+        logger.info(f"Expired {expired} batch job file(s)")
+    return expired
+
+def _ndjson(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+async def _generate_item(index: int, item: TopicGenerateRequest, requester: str) -> dict:
+    result = {
+        "type": "item",
+        "index": index,
+        "topic": item.topic,
+        "template_used": item.template_key,
+        "success": False,
+        "content": None,
+        "provider": "none",
+        "error": None
+    }
+
+    try:
+        system_prompt, prompt = build_topic_prompt(item)
+        content, provider, _ = await llm_manager.generate(
+            prompt=prompt,
+            system=system_prompt,
+            priority=PRIORITY_BATCH,
+            user_id=requester,
+            max_tokens=POST_MAX_TOKENS
+        )
+        result["provider"] = provider
+        if content:
+            result["success"] = True
+            result["content"] = content.strip()
+        else:
+            result["error"] = "AI generation failed"
+    except HTTPException as e:
+        result["error"] = e.detail
+    except Exception as e:
+        logger.error(f"Batch item {index} error: {str(e)}")
+        result["error"] = str(e)
+
+    return result
+
+@router.post("/generate/batch")
+async def generate_batch(request: BatchGenerateRequest, requester: str = Depends(get_requester_id)):
+    """
+    Generate posts for a list of topics, streaming NDJSON lines:
+
+    - {"type": "job", "job_id", "total", "resumed"} first
+    - {"type": "item", "index", "topic", "success", "content", "provider", "error"} per topic, in completion order
+    - {"type": "done", "job_id", "succeeded", "failed"} last
+
+    Pass the returned job_id with the same items to resume an interrupted batch
+    or retry its failed items.
+    """
+    if request.job_id:
+        if not JOB_ID_PATTERN.match(request.job_id):
+            raise HTTPException(status_code=400, detail="Invalid job_id")
+        job_id = request.job_id
+    else:
+        job_id = uuid.uuid4().hex
+
+    os.makedirs(settings.BATCH_JOBS_DIR, exist_ok=True)
+    finished = await asyncio.to_thread(_load_finished, job_id, _items_hash(request.items))
+    if finished is None:
+        raise HTTPException(status_code=409, detail="job_id belongs to a batch with different items")
+    todo = [index for index in range(len(request.items)) if index not in finished]
+
+    logger.info(f"Batch {job_id}: {len(request.items)} items, {len(finished)} already done")
+
+    async def stream():
+        succeeded = len(finished)
+        failed = 0
+        yield _ndjson({"type": "job", "job_id": job_id, "total": len(request.items), "resumed": len(finished)})
+
+        for index in sorted(finished):
+            yield _ndjson(finished[index])
+
+        semaphore = asyncio.Semaphore(request.concurrency or settings.BATCH_CONCURRENCY)
+
+        async def run(index: int) -> dict:
+            async with semaphore:
+                result = await _generate_item(index, request.items[index], requester)
+            await asyncio.to_thread(_append_result, job_id, result)
+            return result
+
+        tasks = [asyncio.create_task(run(index)) for index in todo]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["success"]:
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield _ndjson(result)
+        finally:
+            # Client went away: stop outstanding work, it can be resumed later
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        logger.info(f"Batch {job_id} finished: {succeeded} succeeded, {failed} failed")
+        if not failed:
+            # Nothing left to resume (failed items keep the file for a retry)
+            await asyncio.to_thread(_delete_job, job_id)
+        yield _ndjson({"type": "done", "job_id": job_id, "succeeded": succeeded, "failed": failed})
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -2,11 +2,17 @@
 Generate LinkedIn post from reference post (style transfer)
 This mimics the tone, structure, and formatting of a pasted post
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from typing import Optional
 from app.services.llm_manager import llm_manager
-from app.services.templates import get_template
+from app.services.templates import render_template
+from app.services.prompt_registry import prompt_registry
+from app.services.scheduler import PRIORITY_GENERATION
+from app.services.prompt_budget import POST_MAX_TOKENS, fit_prompt_parts
+from app.services.chat_sessions import chat_sessions
+from app.api.generate_topic import DEFAULT_TEMPLATE
+from app.auth.routes import get_requester_id
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,31 +29,14 @@ class ReferenceGenerateResponse(BaseModel):
     provider: str
     source: str  # "reference" | "template" | "default"
 
-@router.post("/generate/from-reference", response_model=ReferenceGenerateResponse)
-async def generate_from_reference(request: ReferenceGenerateRequest):
-    """
-    Generate LinkedIn post using style transfer from reference post
-    
-    Priority:
-    1. If reference_post provided → mimic its style
-    2. Else if template_id provided → use template
-    3. Else → use default structure
-    """
-    try:
-        logger.info(f"Generating post for topic: {request.topic[:50]}...")
-        
-        # PRIORITY 1: Reference post (style transfer)
-        if request.reference_post and request.reference_post.strip():
-            logger.info("Using reference post for style transfer")
-            
-            system_prompt = """You are an expert LinkedIn content analyst and writer. 
+REFERENCE_SYSTEM = """You are an expert LinkedIn content analyst and writer. 
 Your task is to analyze a reference post's style and create a new post on a different topic using the SAME style."""
-            
-            prompt = f"""REFERENCE POST (analyze this style):
-{request.reference_post}
+
+REFERENCE_PROMPT = """REFERENCE POST (analyze this style):
+{reference_post}
 
 TASK:
-Write a NEW LinkedIn post about: {request.topic}
+Write a NEW LinkedIn post about: {topic}
 
 CRITICAL REQUIREMENTS:
 1. Analyze the reference post's:
@@ -60,7 +49,7 @@ CRITICAL REQUIREMENTS:
    - Opening hook style
    - Bullet/list usage
    
-2. Create a NEW post about "{request.topic}" that:
+2. Create a NEW post about "{topic}" that:
    - Uses the SAME tone and voice
    - Has SIMILAR structure and spacing
    - Matches emoji density and placement
@@ -73,39 +62,63 @@ CRITICAL REQUIREMENTS:
 
 Generate the styled post now:"""
 
+REFERENCE_TEMPLATE = prompt_registry.register(
+    "reference.style", REFERENCE_PROMPT, ("reference_post", "topic"), system=REFERENCE_SYSTEM
+)
+
+@router.post("/generate/from-reference", response_model=ReferenceGenerateResponse)
+async def generate_from_reference(
+    request: ReferenceGenerateRequest,
+    requester: str = Depends(get_requester_id)
+):
+    """
+    Generate LinkedIn post using style transfer from reference post
+    
+    Priority:
+    1. If reference_post provided → mimic its style
+    2. Else if template_id provided → use template
+    3. Else → use default structure
+    """
+    try:
+        logger.info(f"Generating post for topic: {request.topic[:50]}...")
+        
+        # PRIORITY 1: Reference post (style transfer)
+        if request.reference_post and request.reference_post.strip():
+            logger.info("Using reference post for style transfer")
+            
+            reference_post = fit_prompt_parts(
+                REFERENCE_SYSTEM + REFERENCE_TEMPLATE.render(reference_post="", topic=request.topic),
+                {"reference_post": request.reference_post},
+                POST_MAX_TOKENS
+            )["reference_post"] or ""
+            
+            prompt, template = prompt_registry.render(
+                REFERENCE_TEMPLATE.name, reference_post=reference_post, topic=request.topic
+            )
+            
             source = "reference"
             
         # PRIORITY 2: Template
         elif request.template_id:
             logger.info(f"Using template: {request.template_id}")
             
-            template_data = get_template(request.template_id)
-            system_prompt = template_data["system"]
-            prompt = template_data["template"].format(topic=request.topic)
+            prompt, template = render_template(request.template_id, request.topic)
             source = "template"
             
         # PRIORITY 3: Default
         else:
             logger.info("Using default LinkedIn post structure")
             
-            system_prompt = "You are an expert LinkedIn content creator who writes engaging professional posts."
-            prompt = f"""Create a professional LinkedIn post about: {request.topic}
-
-Guidelines:
-- Make it engaging and authentic
-- Use line breaks for readability
-- Keep it concise (150-250 words)
-- Include 1-2 relevant emojis if appropriate
-- End with a question or call-to-action
-- Professional but conversational tone
-
-Generate ONLY the post content, no meta-commentary."""
+            prompt, template = prompt_registry.render(DEFAULT_TEMPLATE.name, topic=request.topic)
             source = "default"
         
         # Call LLM with fallback
-        content, provider = await llm_manager.generate(
+        content, provider, fresh = await llm_manager.generate(
             prompt=prompt,
-            system=system_prompt
+            system=template.system,
+            priority=PRIORITY_GENERATION,
+            user_id=requester,
+            max_tokens=POST_MAX_TOKENS
         )
         
         if not content:
@@ -115,6 +128,10 @@ Generate ONLY the post content, no meta-commentary."""
             )
         
         logger.info(f"✓ Generated post using {provider} (source: {source}, {len(content)} chars)")
+        # Follow-up edits of this post can continue the conversation, if
+        # this request was the one that produced it
+        if fresh:
+            chat_sessions.record(requester, provider, template.system, prompt, content.strip())
         
         return ReferenceGenerateResponse(
             success=True,
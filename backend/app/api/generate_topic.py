@@ -2,11 +2,17 @@
 Topic-based post generation endpoint
 Real implementation with Ollama → Gemini fallback
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from typing import Optional
 from app.services.llm_manager import llm_manager
-from app.services.templates import get_template
+from app.services.templates import render_template
+from app.services.prompt_registry import prompt_registry
+from app.services.chat_sessions import chat_sessions
+from app.services.scheduler import PRIORITY_GENERATION
+from app.services.prompt_budget import POST_MAX_TOKENS, add_custom_instructions
+from app.api.streaming import sse_response
+from app.auth.routes import get_requester_id
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,27 +29,9 @@ class TopicGenerateResponse(BaseModel):
     provider: str  # "ollama" or "gemini"
     template_used: Optional[str] = None
 
-@router.post("/generate/topic", response_model=TopicGenerateResponse)
-async def generate_from_topic(request: TopicGenerateRequest):
-    """
-    Generate a LinkedIn post from a topic
-    Uses template if provided, otherwise generates generic post
-    """
-    try:
-        logger.info(f"Generating post from topic: {request.topic[:50]}...")
-        
-        # Get template if specified
-        template_data = get_template(request.template_key) if request.template_key else None
-        
-        # Build system prompt
-        if template_data:
-            system_prompt = template_data["system"]
-            prompt_template = template_data["template"]
-            prompt = prompt_template.format(topic=request.topic)
-        else:
-            # Default professional LinkedIn post
-            system_prompt = "You are an expert LinkedIn content creator who writes engaging professional posts."
-            prompt = f"""Create a professional LinkedIn post about: {request.topic}
+DEFAULT_SYSTEM = "You are an expert LinkedIn content creator who writes engaging professional posts."
+
+DEFAULT_PROMPT = """Create a professional LinkedIn post about: {topic}
 
 Guidelines:
 - Make it engaging and authentic
@@ -54,25 +42,60 @@ Guidelines:
 - Professional but conversational tone
 
 Generate ONLY the post content, no meta-commentary."""
+
+DEFAULT_TEMPLATE = prompt_registry.register("topic.default", DEFAULT_PROMPT, ("topic",), system=DEFAULT_SYSTEM)
+
+GENERATION_FAILED_DETAIL = "AI generation failed. Please ensure Ollama is running or configure Gemini API key."
+
+def build_topic_prompt(request: TopicGenerateRequest) -> tuple[str, str]:
+    """
+    Build (system, prompt) for a topic request
+    Uses template if provided, otherwise a generic professional post
+    """
+    # Use the template if specified, otherwise the default professional post
+    if request.template_key:
+        prompt, template = render_template(request.template_key, request.topic)
+    else:
+        prompt, template = prompt_registry.render(DEFAULT_TEMPLATE.name, topic=request.topic)
+    system_prompt = template.system
+    
+    # Add custom instructions if provided (trimmed to the prompt budget)
+    prompt = add_custom_instructions(system_prompt, prompt, request.custom_instructions, POST_MAX_TOKENS)
+    
+    return system_prompt, prompt
+
+@router.post("/generate/topic", response_model=TopicGenerateResponse)
+async def generate_from_topic(request: TopicGenerateRequest, requester: str = Depends(get_requester_id)):
+    """
+    Generate a LinkedIn post from a topic
+    Uses template if provided, otherwise generates generic post
+    """
+    try:
+        logger.info(f"Generating post from topic: {request.topic[:50]}...")
         
-        # Add custom instructions if provided
-        if request.custom_instructions:
-            prompt += f"\n\nAdditional instructions: {request.custom_instructions}"
+        system_prompt, prompt = build_topic_prompt(request)
         
         # Call LLM with fallback
         try:
-            content, provider = await llm_manager.generate(
+            content, provider, fresh = await llm_manager.generate(
                 prompt=prompt,
-                system=system_prompt
+                system=system_prompt,
+                priority=PRIORITY_GENERATION,
+                user_id=requester,
+                max_tokens=POST_MAX_TOKENS
             )
             
             if not content:
                 raise HTTPException(
                     status_code=503,
-                    detail="AI generation failed. Please ensure Ollama is running or configure Gemini API key."
+                    detail=GENERATION_FAILED_DETAIL
                 )
             
             logger.info(f"✓ Generated post using {provider} ({len(content)} chars)")
+            # Follow-up edits of this post can continue the conversation, if
+            # this request was the one that produced it
+            if fresh:
+                chat_sessions.record(requester, provider, system_prompt, prompt, content.strip())
             
             return TopicGenerateResponse(
                 success=True,
@@ -81,6 +104,8 @@ Generate ONLY the post content, no meta-commentary."""
                 template_used=request.template_key
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"LLM generation error: {str(e)}")
             raise HTTPException(
@@ -95,4 +120,22 @@ Generate ONLY the post content, no meta-commentary."""
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/generate/topic/stream")
+async def generate_from_topic_stream(request: TopicGenerateRequest, requester: str = Depends(get_requester_id)):
+    """
+    Generate a LinkedIn post from a topic, streaming tokens as Server-Sent Events
+    """
+    logger.info(f"Streaming post from topic: {request.topic[:50]}...")
+    system_prompt, prompt = build_topic_prompt(request)
+    return await sse_response(
+        llm_manager.generate_stream(
+            prompt=prompt,
+            system=system_prompt,
+            priority=PRIORITY_GENERATION,
+            user_id=requester,
+            max_tokens=POST_MAX_TOKENS
+        ),
+        error_detail=GENERATION_FAILED_DETAIL
+    )
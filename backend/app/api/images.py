@@ -0,0 +1,70 @@
+"""
+Image delivery from the content-addressed blob store
+A blob's URL never changes content, so responses are cacheable forever.
+The format is negotiated from the Accept header (WebP/AVIF where supported)
+and ?size=thumb returns a preview thumbnail.
+"""
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import FileResponse, Response
+from typing import Optional
+from app.services.blob_store import blob_store, is_blob_hash
+from app.services.image_pipeline import IMAGE_SIZES, MEDIA_TYPES, SIZE_FULL, image_pipeline
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+@router.get("/images/{image_hash}")
+async def get_image(
+    image_hash: str,
+    size: str = Query(SIZE_FULL, description='"full" or "thumb" (preview thumbnail)'),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Serve an image by content hash, in the best format the client accepts
+    """
+    if size not in IMAGE_SIZES:
+        raise HTTPException(status_code=400, detail=f"Invalid size: {size}")
+
+    if not is_blob_hash(image_hash):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    if not await asyncio.to_thread(blob_store.exists, image_hash):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    try:
+        original_format = await asyncio.to_thread(image_pipeline.original_format, image_hash)
+        # Blobs of an unknown type are transcoded (to PNG unless the client prefers another)
+        output_format = image_pipeline.negotiate_format(accept, original_format or "png")
+        variant_hash = await image_pipeline.get_variant(image_hash, original_format, output_format, size)
+    except Exception as e:
+        logger.error(f"Image variant error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to process image")
+
+    etag = f'"{variant_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Vary": "Accept"
+    }
+
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        blob_store.path(variant_hash),
+        media_type=MEDIA_TYPES[output_format],
+        headers=headers
+    )
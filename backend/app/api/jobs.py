@@ -0,0 +1,140 @@
+"""
+Background job API for long-running generations
+Submit returns a job id immediately; poll the job or follow its SSE
+progress channel instead of holding a request open past client timeouts
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.services.jobs import job_manager
+from app.services.job_store import TERMINAL_STATUSES, STATUS_SUCCEEDED
+from app.services.llm_manager import llm_manager
+from app.services.scheduler import PRIORITY_GENERATION
+from app.services.prompt_budget import POST_MAX_TOKENS
+from app.api.generate_topic import TopicGenerateRequest, build_topic_prompt
+from app.api.streaming import SSE_HEADERS, format_sse
+from app.gemini_client import generate_linkedin_content
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+class JobSubmitRequest(BaseModel):
+    kind: str = Field(..., description='Job type: "topic" (text post) or "image_post" (text + image)')
+    topic: str = Field(..., min_length=1, max_length=5000, description="Topic for the post")
+    template_key: Optional[str] = Field(None, description="Template key (topic jobs only)")
+    custom_instructions: Optional[str] = Field(None, description="Additional AI instructions (topic jobs only)")
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # "queued" | "running" | "succeeded" | "failed"
+    progress: float
+    message: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: float
+    updated_at: float
+
+# -------------------------
+# Job handlers
+# -------------------------
+
+async def run_topic_job(params: dict, progress) -> dict:
+    request = TopicGenerateRequest(**params)
+    system_prompt, prompt = build_topic_prompt(request)
+
+    await progress(0.1, "Generating post")
+    content, provider, _ = await llm_manager.generate(
+        prompt=prompt,
+        system=system_prompt,
+        priority=PRIORITY_GENERATION,
+        max_tokens=POST_MAX_TOKENS
+    )
+    if not content:
+        raise RuntimeError("AI generation failed")
+
+    return {
+        "content": content.strip(),
+        "provider": provider,
+        "template_used": request.template_key
+    }
+
+async def run_image_post_job(params: dict, progress) -> dict:
+    await progress(0.1, "Generating text and image")
+    return await generate_linkedin_content(params["topic"])
+
+job_manager.register("topic", run_topic_job)
+job_manager.register("image_post", run_image_post_job)
+
+# -------------------------
+# Routes
+# -------------------------
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: JobSubmitRequest):
+    """
+    Submit a background generation job
+    Resubmitting identical parameters returns the existing job instead of doing the work twice
+    """
+    if not job_manager.has_handler(request.kind):
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {request.kind}")
+
+    params = request.model_dump(exclude={"kind"}, exclude_none=True)
+    job, _ = await job_manager.submit(request.kind, params)
+    return JobResponse(**job)
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Poll job status and result"""
+    job = await job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job)
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Follow a job as Server-Sent Events
+
+    Events:
+        status   - current job snapshot on connect, then {"status"} changes
+        progress - {"progress": float, "message": str}
+        result   - {"result": dict} (final)
+        error    - {"detail": str} (final)
+    """
+    if not await job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    queue = job_manager.subscribe(job_id)
+
+    async def stream():
+        try:
+            # Read the snapshot after subscribing so no transition is missed
+            job = await job_manager.get(job_id)
+            yield format_sse("status", JobResponse(**job).model_dump(exclude={"result"}))
+
+            if job["status"] in TERMINAL_STATUSES:
+                if job["status"] == STATUS_SUCCEEDED:
+                    yield format_sse("result", {"result": job["result"]})
+                else:
+                    yield format_sse("error", {"detail": job["error"]})
+                return
+
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield format_sse(event, data)
+                if event in ("result", "error"):
+                    return
+        finally:
+            job_manager.unsubscribe(job_id, queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=SSE_HEADERS)
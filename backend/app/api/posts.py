@@ -0,0 +1,43 @@
+"""
+Post history endpoint
+Pages through published posts newest first, served from the post log index
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.models import PostListResponse
+from app.utils import count_posts, query_posts
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/posts", response_model=PostListResponse)
+async def list_posts(
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[str] = Query(None, description="Only posts with this status"),
+    topic: Optional[str] = Query(None, description="Only posts with this topic (case-insensitive)"),
+    summary: bool = Query(True, description="Leave out full text (index fields and a preview only)")
+):
+    """
+    List posts newest first; pass next_cursor back as cursor for the next page
+    """
+    try:
+        posts, next_cursor = await query_posts(
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            topic=topic,
+            summary=summary
+        )
+        total = await count_posts()
+        
+        return PostListResponse(posts=posts, total=total, next_cursor=next_cursor)
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error listing posts: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to list posts")
@@ -1,9 +1,13 @@
 """
 API endpoints for post rewriting/editing
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.schemas.post_schemas import RewriteRequest, RewriteResponse, ActionType
 from app.services.llm_manager import llm_manager
+from app.services.scheduler import PRIORITY_INTERACTIVE
+from app.services.prompt_budget import estimate_tokens, fit_output_limit, fit_prompt_parts, rewrite_token_limit
+from app.services.prompt_registry import prompt_registry
+from app.auth.routes import get_requester_id
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,34 +52,77 @@ ACTION_PROMPTS = {
     }
 }
 
+ACTION_TEMPLATES = {
+    action: prompt_registry.register(
+        f"rewrite.{action.value}",
+        config["prompt"],
+        ("text", "custom") if action == ActionType.CUSTOM else ("text",),
+        system=config["system"]
+    )
+    for action, config in ACTION_PROMPTS.items()
+}
+
+# Actions that only touch spelling, emojis or hashtags may reuse cached answers
+CACHEABLE_ACTIONS = {ActionType.FIX_GRAMMAR, ActionType.ADD_EMOJIS, ActionType.ADD_HASHTAGS}
+
+# Expected output length relative to the input text (for the output token limit)
+ACTION_OUTPUT_GROWTH = {ActionType.MAKE_LONGER: 1.7, ActionType.CUSTOM: 1.5}
+DEFAULT_OUTPUT_GROWTH = 1.1
+OUTPUT_SLACK = 200
+
 @router.post("/rewrite", response_model=RewriteResponse)
-async def rewrite_post(request: RewriteRequest):
+async def rewrite_post(request: RewriteRequest, requester: str = Depends(get_requester_id)):
     """
     Rewrite/edit a LinkedIn post using AI
     """
     try:
         # Get action configuration
-        if request.action not in ACTION_PROMPTS:
+        if request.action not in ACTION_TEMPLATES:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid action: {request.action}"
             )
         
-        action_config = ACTION_PROMPTS[request.action]
+        action_template = ACTION_TEMPLATES[request.action]
+        growth = ACTION_OUTPUT_GROWTH.get(request.action, DEFAULT_OUTPUT_GROWTH)
+        
+        # The text is never trimmed: the output limit is capped at what the
+        # context leaves after it, and the text rejected (413) if its own
+        # length does not fit
+        if request.action == ActionType.CUSTOM:
+            fixed_text = action_template.system + action_template.render(text=request.text, custom="")
+        else:
+            fixed_text = action_template.system + action_template.render(text=request.text)
+        max_tokens = fit_output_limit(
+            fixed_text,
+            rewrite_token_limit(request.text, growth, OUTPUT_SLACK),
+            estimate_tokens(request.text)
+        )
         
-        # Build prompt
-        if request.action == ActionType.CUSTOM and request.custom_instructions:
-            prompt = action_config["prompt"].format(
+        # Build prompt (custom instructions are trimmed to the prompt budget)
+        if request.action == ActionType.CUSTOM:
+            custom = fit_prompt_parts(
+                fixed_text,
+                {"custom_instructions": request.custom_instructions},
+                max_tokens
+            )["custom_instructions"] or ""
+            prompt, _ = prompt_registry.render(
+                action_template.name,
                 text=request.text,
-                custom=request.custom_instructions
+                custom=custom
             )
         else:
-            prompt = action_config["prompt"].format(text=request.text)
+            prompt, _ = prompt_registry.render(action_template.name, text=request.text)
         
         # Generate with LLM
-        result, provider = await llm_manager.generate(
+        result, provider, _ = await llm_manager.generate(
             prompt=prompt,
-            system=action_config["system"]
+            system=action_template.system,
+            cache=request.action in CACHEABLE_ACTIONS,
+            priority=PRIORITY_INTERACTIVE,
+            user_id=requester,
+            max_tokens=max_tokens,
+            prompt_version=action_template.version
         )
         
         if not result:
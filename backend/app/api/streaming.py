@@ -0,0 +1,74 @@
+"""
+Server-Sent Events helpers for the streaming generation endpoints
+"""
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Tuple
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+}
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode a single SSE frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_response(
+    token_stream: AsyncIterator[Tuple[str, str]],
+    error_detail: str
+) -> StreamingResponse:
+    """
+    Turn a (token, provider) stream into an SSE response.
+
+    The first token is awaited before the response starts, so a request that
+    fails on every provider still gets a proper 503 instead of an empty stream.
+
+    Events:
+        token - {"token": str, "provider": str}
+        done  - {"provider": str, "length": int}
+        error - {"detail": str} (only if a provider fails mid-stream)
+    """
+    try:
+        first_token, provider = await token_stream.__anext__()
+    except StopAsyncIteration:
+        await token_stream.aclose()
+        raise HTTPException(status_code=503, detail=error_detail)
+    except HTTPException:
+        await token_stream.aclose()
+        raise
+    except Exception as e:
+        logger.error(f"Streaming generation error: {str(e)}")
+        await token_stream.aclose()
+        raise HTTPException(status_code=503, detail=error_detail)
+
+    async def event_stream():
+        # Also closes the provider stream if the client disconnects mid-response
+        try:
+            length = len(first_token)
+            yield format_sse("token", {"token": first_token, "provider": provider})
+
+            try:
+                async for token, _ in token_stream:
+                    length += len(token)
+                    yield format_sse("token", {"token": token, "provider": provider})
+            except Exception as e:
+                logger.error(f"Stream interrupted: {str(e)}")
+                yield format_sse("error", {"detail": "Generation was interrupted"})
+                return
+
+            yield format_sse("done", {"provider": provider, "length": length})
+        finally:
+            await token_stream.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -0,0 +1,125 @@
+"""
+Write-behind tracking of user activity (last_active_at)
+Authenticated requests only record a timestamp in memory; a background task
+flushes pending timestamps every ACTIVITY_FLUSH_INTERVAL seconds as one
+unordered bulk_write, with at most one write per user per
+ACTIVITY_GRANULARITY seconds. Pending timestamps are flushed on shutdown.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    def __init__(self, flush_interval: float, granularity: float):
+        self.flush_interval = flush_interval
+        self.granularity = granularity
+        self._collection = None
+        self._pending: Dict[str, datetime] = {}
+        # monotonic time of each user's last write, for the granularity limit
+        self._written_at: Dict[str, float] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.flushes = 0
+        self.writes = 0
+
+    async def start(self, collection):
+        self._collection = collection
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            logger.info("Activity tracker started")
+
+    async def stop(self):
+        """Stop the flush loop and write everything still pending"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush(force=True)
+        logger.info("Activity tracker stopped")
+
+    def touch(self, user_id: str, at: Optional[datetime] = None):
+        """Record activity of user_id (no I/O)"""
+        at = at or datetime.utcnow()
+        previous = self._pending.get(user_id)
+        if previous is None or at > previous:
+            self._pending[user_id] = at
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Activity flush failed: {str(e)}")
+
+    async def flush(self, force: bool = False) -> int:
+        """
+        Write pending timestamps of users outside the granularity window
+        (all of them if force). Returns the number of users written.
+        """
+        if self._collection is None:
+            return 0
+
+        async with self._flush_lock:
+            now = time.monotonic()
+            due = {
+                user_id: at for user_id, at in self._pending.items()
+                if force or now - self._written_at.get(user_id, float("-inf")) >= self.granularity
+            }
+            if not due:
+                return 0
+
+            operations = []
+            for user_id, at in due.items():
+                del self._pending[user_id]
+                try:
+                    # $max: a delayed or concurrent flush never moves the time back
+                    operations.append(UpdateOne({"_id": ObjectId(user_id)}, {"$max": {"last_active_at": at}}))
+                except (InvalidId, TypeError):
+                    continue
+
+            try:
+                if operations:
+                    await self._collection.bulk_write(operations, ordered=False)
+            except Exception:
+                # Keep the timestamps for the next flush
+                for user_id, at in due.items():
+                    self.touch(user_id, at)
+                raise
+
+            for user_id in due:
+                self._written_at[user_id] = now
+            # Users outside the window need no entry to be written again
+            for user_id in [u for u, t in self._written_at.items() if now - t >= self.granularity]:
+                del self._written_at[user_id]
+
+            self.flushes += 1
+            self.writes += len(operations)
+            logger.info(f"Flushed activity of {len(operations)} users")
+            return len(operations)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "writes": self.writes,
+        }
+
+
+activity_tracker = ActivityTracker(
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL,
+    granularity=settings.ACTIVITY_GRANULARITY
+)
@@ -1,7 +1,7 @@
 """
 Enhanced authentication routes with session management
 """
-from fastapi import APIRouter, HTTPException, Depends, Response, Cookie, Header
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, Cookie, Header
 from typing import Optional
 from datetime import datetime, timedelta
 from app.auth.schemas import (
@@ -9,7 +9,7 @@ from app.auth.schemas import (
 )
 from app.auth.service import auth_service
 from app.users.model import UserOut, UserProfileUpdate
-from app.core.security import decode_token
+from app.core.security import decode_token, new_token_id
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,15 +35,29 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
     
-    user = await auth_service.get_user_by_id(user_id)
+    # Cached projection; last active timestamp is written behind
+    user = await auth_service.get_current_user(user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     
-    # Update last active timestamp
-    await auth_service.update_last_active(user_id)
-    
     return user
 
+async def get_requester_id(request: Request, authorization: Optional[str] = Header(None)) -> str:
+    """
+    Dependency identifying the caller for fair queuing of AI requests.
+    Uses the user id from a valid access token (no DB lookup), otherwise
+    falls back to the client address so anonymous callers are still separated.
+    """
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            payload = decode_token(token)
+            if payload and payload.get("type") == "access" and payload.get("sub"):
+                return f"user:{payload['sub']}"
+    
+    client_host = request.client.host if request.client else "unknown"
+    return f"ip:{client_host}"
+
 @router.post("/signup", response_model=AuthResponse)
 async def signup(request: SignupRequest, response: Response):
     """Register a new user with refresh token"""
@@ -84,6 +98,8 @@ async def signup(request: SignupRequest, response: Response):
             }
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -153,25 +169,16 @@ async def refresh_token(response: Response, refresh_token: Optional[str] = Cooki
         if not user_id or not token_id:
             raise HTTPException(status_code=401, detail="Invalid token payload")
         
-        # Validate refresh token
-        is_valid = await auth_service.validate_refresh_token(user_id, token_id)
-        if not is_valid:
-            raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
-        
-        # Get user
-        user = await auth_service.get_user_by_id(user_id)
+        # Validate the old refresh token and replace it with the new one
+        # atomically, then read the user for the response
+        rotated_token_id = new_token_id()
+        expires_at = datetime.utcnow() + timedelta(days=7)
+        user = await auth_service.rotate_refresh_token(user_id, token_id, rotated_token_id, expires_at)
         if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+            raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
         
         # Create new tokens (token rotation)
-        new_access_token, new_refresh_token, new_token_id = auth_service.create_tokens_for_user(user)
-        
-        # Revoke old refresh token
-        await auth_service.revoke_refresh_token(user_id, token_id)
-        
-        # Store new refresh token
-        expires_at = datetime.utcnow() + timedelta(days=7)
-        await auth_service.store_refresh_token(user.id, new_token_id, expires_at)
+        new_access_token, new_refresh_token, _ = auth_service.create_tokens(user_id, user.email, rotated_token_id)
         
         # Set new refresh token cookie
         response.set_cookie(
@@ -187,7 +194,7 @@ async def refresh_token(response: Response, refresh_token: Optional[str] = Cooki
             access_token=new_access_token,
             token_type="bearer",
             user={
-                "id": str(user.id),
+                "id": user_id,
                 "name": user.name,
                 "email": user.email,
                 "plan": user.plan,
@@ -5,28 +5,44 @@ from datetime import datetime, timedelta
 from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from app.core.security import (
-    verify_password, get_password_hash, 
+    verify_password_async, get_password_hash_async,
     create_access_token, create_refresh_token
 )
-from app.users.model import UserInDB, UserOut, RefreshToken
+from app.users.model import CurrentUser, UserInDB, UserOut, RefreshToken
+from app.auth.user_cache import user_cache
+from app.auth.activity import activity_tracker
+from app.services.single_flight import SingleFlight
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Authorizing a request never needs credentials (refresh_tokens is the
+# pre-migration embedded token list)
+CURRENT_USER_PROJECTION = {"password_hash": 0, "refresh_tokens": 0}
+
 class AuthService:
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.db = None
         self.users_collection = None
+        self.refresh_tokens_collection = None
+        self._user_loads = SingleFlight()
     
     async def connect_db(self):
         if not self.client:
             self.client = AsyncIOMotorClient(settings.MONGODB_URL)
             self.db = self.client[settings.MONGODB_DB_NAME]
             self.users_collection = self.db.users
+            self.refresh_tokens_collection = self.db.refresh_tokens
             await self.users_collection.create_index("email", unique=True)
+            await self.refresh_tokens_collection.create_index("token_id", unique=True)
+            await self.refresh_tokens_collection.create_index("user_id")
+            # MongoDB deletes tokens once expires_at has passed
+            await self.refresh_tokens_collection.create_index("expires_at", expireAfterSeconds=0)
+            await self.migrate_embedded_refresh_tokens()
             logger.info("Connected to MongoDB")
     
     async def close_db(self):
@@ -49,6 +65,34 @@ class AuthService:
             pass
         return None
     
+    async def get_current_user(self, user_id: str) -> Optional[CurrentUser]:
+        """
+        Resolve an access token's user id and record the activity. Served
+        from the user cache; on a miss the user is read without credentials.
+        """
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await self._user_loads.do(f"user:{user_id}", lambda: self._load_current_user(user_id))
+        if user is not None:
+            activity_tracker.touch(user_id)
+        return user
+    
+    async def _load_current_user(self, user_id: str) -> Optional[CurrentUser]:
+        generation = user_cache.generation
+        try:
+            user_dict = await self.users_collection.find_one(
+                {"_id": ObjectId(user_id)},
+                projection=CURRENT_USER_PROJECTION
+            )
+        except Exception:
+            return None
+        if not user_dict:
+            return None
+        
+        user = CurrentUser(**user_dict)
+        user_cache.set(user_id, user, generation)
+        return user
+    
     async def create_user(self, name: str, email: str, password: str) -> UserInDB:
         existing_user = await self.get_user_by_email(email)
         if existing_user:
@@ -57,11 +101,10 @@ class AuthService:
         user = UserInDB(
             name=name,
             email=email,
-            password_hash=get_password_hash(password),
+            password_hash=await get_password_hash_async(password),
             created_at=datetime.utcnow(),
             plan="free",
-            is_active=True,
-            refresh_tokens=[]
+            is_active=True
         )
         
         user_dict = user.dict(by_alias=True, exclude={"id"})
@@ -73,7 +116,7 @@ class AuthService:
     
     async def authenticate_user(self, email: str, password: str) -> Optional[UserInDB]:
         user = await self.get_user_by_email(email)
-        if not user or not verify_password(password, user.password_hash):
+        if not user or not await verify_password_async(password, user.password_hash):
             return None
         
         await self.update_last_login(user.id)
@@ -90,55 +133,98 @@ class AuthService:
         )
     
     async def update_last_active(self, user_id: str):
-        """Update user's last activity timestamp"""
-        try:
+        """Record user's activity (written behind by the activity tracker)"""
+        activity_tracker.touch(user_id)
+    
+    async def migrate_embedded_refresh_tokens(self):
+        """Move refresh tokens still embedded in user documents into refresh_tokens"""
+        now = datetime.utcnow()
+        migrated = 0
+        cursor = self.users_collection.find(
+            {"refresh_tokens": {"$exists": True}},
+            {"refresh_tokens": 1}
+        )
+        async for user_dict in cursor:
+            tokens = [
+                RefreshToken(
+                    token_id=rt["token_id"], user_id=user_dict["_id"], expires_at=rt["expires_at"]
+                ).dict()
+                for rt in user_dict.get("refresh_tokens") or []
+                if rt.get("expires_at") and rt["expires_at"] > now
+            ]
+            if tokens:
+                try:
+                    await self.refresh_tokens_collection.insert_many(tokens, ordered=False)
+                except BulkWriteError:
+                    pass  # Already migrated by an earlier, interrupted run
+                migrated += len(tokens)
             await self.users_collection.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$set": {"last_active_at": datetime.utcnow()}}
+                {"_id": user_dict["_id"]},
+                {"$unset": {"refresh_tokens": ""}}
             )
-        except:
-            pass
+        if migrated:
+            logger.info(f"Migrated {migrated} embedded refresh tokens")
     
     async def store_refresh_token(self, user_id: ObjectId, token_id: str, expires_at: datetime):
-        """Store refresh token ID in user document"""
-        refresh_token = RefreshToken(token_id=token_id, expires_at=expires_at)
-        await self.users_collection.update_one(
-            {"_id": user_id},
-            {"$push": {"refresh_tokens": refresh_token.dict()}}
-        )
+        """Store a refresh token ID"""
+        refresh_token = RefreshToken(token_id=token_id, user_id=user_id, expires_at=expires_at)
+        await self.refresh_tokens_collection.insert_one(refresh_token.dict())
+    
+    async def rotate_refresh_token(
+        self,
+        user_id: str,
+        token_id: str,
+        new_token_id: str,
+        expires_at: datetime
+    ) -> Optional[CurrentUser]:
+        """
+        Replace a valid refresh token with a new one in a single operation
+        and return its user (through the user cache, so plan or avatar
+        changes show up like on any authorized request). Returns None if the
+        token is unknown, revoked or expired, so of two concurrent refreshes
+        with the same token only one succeeds.
+        """
+        try:
+            now = datetime.utcnow()
+            rotated = await self.refresh_tokens_collection.find_one_and_update(
+                {"token_id": token_id, "user_id": ObjectId(user_id), "expires_at": {"$gt": now}},
+                {"$set": {"token_id": new_token_id, "expires_at": expires_at, "created_at": now}},
+                projection={"_id": 1}
+            )
+        except Exception:
+            return None
+        if rotated is None:
+            return None
+        
+        return await self.get_current_user(user_id)
     
     async def revoke_refresh_token(self, user_id: str, token_id: str):
         """Revoke a specific refresh token"""
         try:
-            await self.users_collection.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$pull": {"refresh_tokens": {"token_id": token_id}}}
+            await self.refresh_tokens_collection.delete_one(
+                {"token_id": token_id, "user_id": ObjectId(user_id)}
             )
         except:
             pass
+        user_cache.invalidate(user_id)
     
     async def revoke_all_refresh_tokens(self, user_id: str):
         """Revoke all refresh tokens for user (logout from all devices)"""
         try:
-            await self.users_collection.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$set": {"refresh_tokens": []}}
-            )
+            await self.refresh_tokens_collection.delete_many({"user_id": ObjectId(user_id)})
         except:
             pass
+        user_cache.invalidate(user_id)
     
     async def validate_refresh_token(self, user_id: str, token_id: str) -> bool:
         """Check if refresh token is valid and not revoked"""
         try:
-            user = await self.get_user_by_id(user_id)
-            if not user:
-                return False
-            
-            # Check if token exists and not expired
-            for rt in user.refresh_tokens:
-                if rt.token_id == token_id and rt.expires_at > datetime.utcnow():
-                    return True
-            return False
+            # The TTL monitor runs about once a minute, so check expiry here too
+            token = await self.refresh_tokens_collection.find_one(
+                {"token_id": token_id, "user_id": ObjectId(user_id), "expires_at": {"$gt": datetime.utcnow()}},
+                projection={"_id": 1}
+            )
+            return token is not None
         except:
             return False
     
@@ -161,6 +247,7 @@ class AuthService:
                     {"_id": ObjectId(user_id)},
                     {"$set": update_data}
                 )
+                user_cache.invalidate(user_id)
             
             return await self.get_user_by_id(user_id)
         except:
@@ -168,13 +255,17 @@ class AuthService:
     
     def create_tokens_for_user(self, user: UserInDB) -> tuple[str, str, str]:
         """Create both access and refresh tokens"""
+        return self.create_tokens(str(user.id), user.email)
+    
+    def create_tokens(self, user_id: str, email: str, token_id: Optional[str] = None) -> tuple[str, str, str]:
+        """Create both access and refresh tokens (refresh token with token_id if given)"""
         token_data = {
-            "sub": str(user.id),
-            "email": user.email
+            "sub": user_id,
+            "email": email
         }
         
         access_token = create_access_token(token_data)
-        refresh_token, token_id = create_refresh_token(token_data)
+        refresh_token, token_id = create_refresh_token(token_data, token_id)
         
         return access_token, refresh_token, token_id
 
@@ -0,0 +1,67 @@
+"""
+Short-TTL cache of authenticated users
+Keeps the projected user document (no password hash or refresh tokens) that
+get_current_user resolves an access token to, so protected calls within the
+TTL skip MongoDB entirely. Entries are invalidated on profile updates and
+token revocation; the TTL bounds staleness for changes made elsewhere.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.config import settings
+from app.users.model import CurrentUser
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, CurrentUser]]" = OrderedDict()
+        # Bumped on every invalidation: a lookup that started before it must
+        # not store the (possibly stale) user it read
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[CurrentUser]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def set(self, user_id: str, user: CurrentUser, generation: int):
+        """Store user as read at generation (ignored if invalidated since)"""
+        if generation != self.generation or self.ttl <= 0:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self.generation += 1
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+user_cache = UserCache(max_entries=settings.USER_CACHE_MAX_ENTRIES, ttl=settings.USER_CACHE_TTL)
@@ -9,11 +9,89 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "mistral"
     OLLAMA_TIMEOUT: int = 3000
+    OLLAMA_MAX_CONNECTIONS: int = 8
+    OLLAMA_MAX_IN_FLIGHT: int = 2
+    # How long Ollama keeps the model (and its KV cache) loaded between requests
+    OLLAMA_KEEP_ALIVE: str = "30m"
     
     # Google Gemini Configuration
     GEMINI_API_KEY: Optional[str] = None
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_MAX_CONNECTIONS: int = 16
+    GEMINI_MAX_IN_FLIGHT: int = 8
     
+    # HTTP connection pool settings (shared by the LLM provider clients)
+    HTTP_KEEPALIVE_TIMEOUT: int = 60
+    HTTP_DNS_CACHE_TTL: int = 300
+    
+    # Admission control: requests beyond this many queued per provider get a 429
+    SCHEDULER_MAX_QUEUE_DEPTH: int = 32
+    
+    # Circuit breaker for LLM providers
+    CIRCUIT_WINDOW_SIZE: int = 20
+    CIRCUIT_MIN_CALLS: int = 3
+    CIRCUIT_FAILURE_RATE: float = 0.5
+    CIRCUIT_OPEN_SECONDS: int = 30
+    CIRCUIT_PROBE_INTERVAL: int = 10
+    
+    # Hedged requests: start the fallback provider if the primary is slower
+    # than its observed HEDGE_PERCENTILE latency (clamped to min/max)
+    HEDGE_PERCENTILE: float = 0.95
+    HEDGE_DEFAULT_DELAY: float = 5.0
+    HEDGE_MIN_DELAY: float = 0.5
+    HEDGE_MAX_DELAY: float = 30.0
+    LATENCY_WINDOW_SIZE: int = 200
+    
+    # LLM response cache ("memory", "sqlite" or "none")
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_TTL: int = 3600
+    RESPONSE_CACHE_PATH: str = "response_cache.db"
+    
+    # Batch generation
+    BATCH_MAX_ITEMS: int = 200
+    BATCH_CONCURRENCY: int = 4
+    BATCH_MAX_CONCURRENCY: int = 16
+    BATCH_JOBS_DIR: str = "batch_jobs"
+    BATCH_JOB_TTL: int = 7 * 24 * 3600
+    
+    # Background jobs
+    JOB_STORE_PATH: str = "jobs.db"
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_DEDUPE_SECONDS: int = 600
+    # Running jobs hold a lease their process renews; expired ones are requeued
+    JOB_LEASE_SECONDS: int = 60
+    
+    # Fallback images: FALLBACK_IMAGE_LAYOUTS shape layouts per color theme,
+    # cached as encoded PNGs up to FALLBACK_IMAGE_CACHE_MAX_BYTES
+    FALLBACK_IMAGE_LAYOUTS: int = 64
+    FALLBACK_IMAGE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    FALLBACK_IMAGE_WARMUP: bool = False
+    
+    # Content-addressed image storage, served from /api/images/{hash}
+    BLOB_STORE_DIR: str = "blobs"
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_THUMBNAIL_WIDTH: int = 480
+    IMAGE_MANIFEST_CACHE_ENTRIES: int = 1024
+    
+    # Prompt token budget: optional prompt parts (reference post, custom
+    # instructions) are trimmed to keep prompts within PROMPT_MAX_TOKENS; text
+    # being edited is never trimmed and only has to fit the Ollama context
+    # window next to the output limit.
+    # Gemini 2.5 counts thinking tokens against maxOutputTokens, so they are
+    # added on top of the answer's output limit. The context must hold an edit
+    # of a MAX_INPUT_LENGTH post together with the edited post.
+    OLLAMA_CONTEXT_TOKENS: int = 8192
+    PROMPT_MAX_TOKENS: int = 2048
+    GEMINI_THINKING_TOKENS: int = 1024
+    
+    # Ollama chat sessions: edits of the post the model just wrote continue
+    # the conversation (up to CHAT_SESSION_MAX_TURNS turns) to reuse its KV cache
+    CHAT_SESSION_MAX_ENTRIES: int = 1000
+    CHAT_SESSION_TTL: int = 1800
+    CHAT_SESSION_MAX_TURNS: int = 5
+
     # MongoDB Configuration
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "linkedin_post_generator"
@@ -23,6 +101,20 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Password hashing: bcrypt cost factor and the bounded pool it runs on
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    
+    # Authenticated user lookups are cached for USER_CACHE_TTL seconds
+    USER_CACHE_TTL: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    
+    # last_active_at is written behind: flushed every ACTIVITY_FLUSH_INTERVAL
+    # seconds, at most once per user per ACTIVITY_GRANULARITY seconds
+    ACTIVITY_FLUSH_INTERVAL: int = 10
+    ACTIVITY_GRANULARITY: int = 60
+    
     # Application Settings
     MAX_INPUT_LENGTH: int = 5000
     MAX_OUTPUT_LENGTH: int = 3000
@@ -2,10 +2,15 @@
 Enhanced security with refresh tokens and session management
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
+import asyncio
+import logging
 import secrets
+import time
 
+from fastapi import HTTPException
 from jose import jwt
 from jose.exceptions import ExpiredSignatureError, JWTError
 from passlib.context import CryptContext
@@ -13,7 +18,13 @@ from passlib.context import CryptContext
 from app.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
 
 
 # -------------------------
@@ -28,6 +39,98 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordPoolBusyError(HTTPException):
+    """Raised when too many password operations are queued; surfaces as 429 with Retry-After"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=429,
+            detail=f"Too many sign-in attempts in progress. Please retry in {retry_after}s.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class PasswordPool:
+    """
+    Bounded executor for bcrypt work, so hashing never runs on the event loop.
+
+    At most `workers` operations run at once (bcrypt releases the GIL, so
+    threads run in parallel); up to `max_queue` more wait for a slot and any
+    beyond that are rejected with PasswordPoolBusyError.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(workers)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_wait = 0.0
+        self._total_wait = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            logger.warning(f"Password pool queue full ({self.waiting} waiting)")
+            raise PasswordPoolBusyError()
+
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        wait = time.monotonic() - queued_at
+        self._total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self._total_wait / self.completed * 1000, 1) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+password_pool = PasswordPool(workers=settings.PASSWORD_HASH_WORKERS, max_queue=settings.PASSWORD_HASH_MAX_QUEUE)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password pool"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the password pool"""
+    return await password_pool.run(get_password_hash, password)
+
+
 # -------------------------
 # JWT helpers
 # -------------------------
@@ -51,11 +154,16 @@ def create_access_token(data: dict) -> str:
     )
 
 
-def create_refresh_token(data: dict) -> Tuple[str, str]:
+def new_token_id() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def create_refresh_token(data: dict, token_id: Optional[str] = None) -> Tuple[str, str]:
     """
     Create refresh token (7 days) with unique token ID
+    (token_id lets rotation store the ID before the token is signed)
     """
-    token_id = secrets.token_urlsafe(32)
+    token_id = token_id or new_token_id()
     expire = datetime.utcnow() + timedelta(days=7)
 
     to_encode = data.copy()
@@ -1,9 +1,16 @@
 import os
 from typing import Dict
+import asyncio
+import functools
 import logging
+import threading
+import zlib
 from dotenv import load_dotenv
 import base64
 from io import BytesIO
+from app.config import settings
+from app.services.blob_store import blob_store
+from app.services.image_cache import BytesLRUCache
 
 # Load .env file
 load_dotenv(dotenv_path=".env")
@@ -12,8 +19,27 @@ logger = logging.getLogger(__name__)
 
 # Configure API Key
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable not set")
+
+# Shared Gemini client, created on first use
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """
+    Return the shared genai client, creating it on first use.
+    The client keeps its HTTP connections, so it is reused across requests.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not GOOGLE_API_KEY:
+                    raise ValueError("GOOGLE_API_KEY environment variable not set")
+                
+                from google import genai
+                _client = genai.Client(api_key=GOOGLE_API_KEY)
+    return _client
 
 # LinkedIn Post Prompt
 LINKEDIN_PROMPT_TEMPLATE = """Create a professional LinkedIn post about: "{topic}"
@@ -57,42 +83,38 @@ async def generate_linkedin_content(topic: str) -> Dict[str, str]:
     """
     Generate LinkedIn post text and image using Gemini API.
     Uses NEW Gemini API with gemini-2.5-flash-image model.
+    Text and image are requested concurrently through the SDK's async API.
+    The image is stored in the blob store and only its hash is returned;
+    it is served from /api/images/{image_hash}.
     
     Args:
         topic: The topic for the LinkedIn post
         
     Returns:
-        Dict with 'text' and 'image' (base64 encoded) keys
+        Dict with 'text' and 'image_hash' keys
     """
     try:
-        # Import the NEW Gemini API
-        from google import genai
-        from google.genai import types
+        client = _get_client()
         
-        # Initialize client with API key
-        client = genai.Client(api_key=GOOGLE_API_KEY)
+        # Image request starts right away and runs while the text is generated
+        logger.info("🎨 Generating image with Gemini (nano banana)...")
+        image_task = asyncio.create_task(generate_image_with_new_gemini(topic, client))
         
-        # Step 1: Generate text content
         logger.info("📝 Generating LinkedIn post text...")
-        text_prompt = LINKEDIN_PROMPT_TEMPLATE.format(topic=topic)
+        try:
+            post_text = await generate_post_text(topic, client)
+        except BaseException:
+            image_task.cancel()
+            raise
         
-        text_response = client.models.generate_content(
-            model="gemini-2.0-flash-exp",
-            contents=[text_prompt]
-        )
-        
-        post_text = text_response.text.strip()
-        logger.info("✅ Text generation successful")
-        
-        # Step 2: Generate image using NEW image generation model
-        logger.info("🎨 Generating image with Gemini (nano banana)...")
-        image_base64 = await generate_image_with_new_gemini(topic, client)
+        image_bytes = await image_task
+        image_hash = await blob_store.put_async(image_bytes)
         
         logger.info("✅ LinkedIn content generated successfully")
         
         return {
             "text": post_text,
-            "image": image_base64
+            "image_hash": image_hash
         }
     
     except Exception as e:
@@ -100,7 +122,29 @@ async def generate_linkedin_content(topic: str) -> Dict[str, str]:
         raise Exception(f"Gemini API error: {str(e)}")
 
 
-async def generate_image_with_new_gemini(topic: str, client) -> str:
+async def generate_post_text(topic: str, client) -> str:
+    """
+    Generate the LinkedIn post text.
+    
+    Args:
+        topic: Topic for the post
+        client: Gemini client instance
+        
+    Returns:
+        Post text
+    """
+    text_prompt = LINKEDIN_PROMPT_TEMPLATE.format(topic=topic)
+    
+    text_response = await client.aio.models.generate_content(
+        model="gemini-2.0-flash-exp",
+        contents=[text_prompt]
+    )
+    
+    logger.info("✅ Text generation successful")
+    return text_response.text.strip()
+
+
+async def generate_image_with_new_gemini(topic: str, client) -> bytes:
     """
     Generate image using NEW Gemini API with gemini-2.5-flash-image model.
     This is the "nano banana" approach from Google's official documentation.
@@ -110,7 +154,7 @@ async def generate_image_with_new_gemini(topic: str, client) -> str:
         client: Gemini client instance
         
     Returns:
-        Base64 encoded image string
+        Encoded image bytes
     """
     try:
         from PIL import Image
@@ -121,8 +165,8 @@ async def generate_image_with_new_gemini(topic: str, client) -> str:
         logger.info(f"🎨 Requesting image with gemini-2.5-flash-image model...")
         logger.info(f"Topic: {topic}")
         
-        # Generate image using the NEW model
-        response = client.models.generate_content(
+        # Generate image using the NEW model (async API, does not block the event loop)
+        response = await client.aio.models.generate_content(
             model="gemini-2.5-flash-image",
             contents=[image_prompt]
         )
@@ -130,7 +174,7 @@ async def generate_image_with_new_gemini(topic: str, client) -> str:
         logger.info("✅ Response received from Gemini")
         
         # Extract image from response (following Google's example)
-        image_base64 = None
+        image_bytes = None
         
         for part in response.candidates[0].content.parts:
             # Check for text response (error case)
@@ -150,9 +194,8 @@ async def generate_image_with_new_gemini(topic: str, client) -> str:
                     image = Image.open(BytesIO(image_data))
                     logger.info(f"Image details: {image.format}, {image.size}, {image.mode}")
                     
-                    # Convert to base64 for transmission
-                    image_base64 = base64.b64encode(image_data).decode('utf-8')
-                    logger.info(f"✅ Image converted to base64 (length: {len(image_base64)})")
+                    image_bytes = image_data
+                    logger.info(f"✅ Image received ({len(image_bytes)} bytes)")
                     
                     break
                     
@@ -161,9 +204,9 @@ async def generate_image_with_new_gemini(topic: str, client) -> str:
                     continue
         
         # If image was successfully generated
-        if image_base64:
+        if image_bytes:
             logger.info("🎉 Gemini image generation successful!")
-            return image_base64
+            return image_bytes
         
         # If no image found, use fallback
         logger.warning("⚠️ No image data found in Gemini response")
@@ -182,176 +225,272 @@ async def generate_image_with_new_gemini(topic: str, client) -> str:
         return await generate_fallback_image(topic)
 
 
-async def generate_fallback_image(topic: str) -> str:
+# Fallback image size (LinkedIn link preview)
+FALLBACK_WIDTH, FALLBACK_HEIGHT = 1200, 630
+
+# Color themes for fallback images, checked in order against topic keywords
+FALLBACK_THEMES = [
+    # Tech theme: Blue/Cyan/Purple
+    ("Tech", ['tech', 'ai', 'digital', 'future', 'innovation', 'data', 'software'],
+     [(30, 64, 175), (59, 130, 246), (139, 92, 246), (168, 85, 247)]),
+    # Health theme: Green/Teal
+    ("Health", ['health', 'medical', 'care', 'wellness', 'hospital', 'doctor'],
+     [(16, 185, 129), (5, 150, 105), (6, 182, 212), (20, 184, 166)]),
+    # Business theme: Navy/Gold
+    ("Business", ['business', 'finance', 'market', 'economy', 'invest', 'money'],
+     [(30, 58, 138), (37, 99, 235), (251, 191, 36), (245, 158, 11)]),
+    # Creative theme: Pink/Orange
+    ("Creative", ['creative', 'design', 'art', 'brand', 'marketing', 'content'],
+     [(236, 72, 153), (219, 39, 119), (249, 115, 22), (251, 146, 60)]),
+]
+
+# Default: Professional blue gradient
+DEFAULT_FALLBACK_THEME = ("Professional", [(30, 64, 175), (37, 99, 235), (59, 130, 246), (96, 165, 250)])
+
+# Encoded fallback PNGs keyed by (theme, seed)
+fallback_image_cache = BytesLRUCache(settings.FALLBACK_IMAGE_CACHE_MAX_BYTES)
+
+
+async def generate_fallback_image(topic: str) -> bytes:
     """
-    Generate a professional fallback image using PIL.
+    Generate a professional fallback image.
+    Rendering is CPU-bound, so it runs in a worker thread.
+    
+    Args:
+        topic: Topic text (used for color scheme selection)
+        
+    Returns:
+        PNG bytes
+    """
+    return await asyncio.to_thread(render_fallback_image, topic)
+
+
+def select_fallback_theme(topic: str):
+    """
+    Pick the color theme for a topic.
+    
+    Returns:
+        (theme name, list of 4 RGB gradient stops)
+    """
+    topic_lower = topic.lower()
+    for theme, keywords, colors in FALLBACK_THEMES:
+        if any(word in topic_lower for word in keywords):
+            return theme, colors
+    return DEFAULT_FALLBACK_THEME
+
+
+def fallback_seed(topic: str) -> int:
+    """
+    Stable layout seed for a topic.
+    Uses CRC32 rather than hash(), which is randomized per process.
+    """
+    normalized = topic.strip().lower().encode("utf-8")
+    return zlib.crc32(normalized) % settings.FALLBACK_IMAGE_LAYOUTS
+
+
+def get_fallback_png(theme: str, colors, seed: int) -> bytes:
+    """Encoded fallback PNG for (theme, seed), rendered on first use and then served from cache"""
+    key = (theme, seed)
+    png = fallback_image_cache.get(key)
+    if png is None:
+        png = render_fallback_png(colors, seed)
+        fallback_image_cache.set(key, png)
+    return png
+
+
+async def warm_fallback_image_cache():
+    """
+    Pre-render every (theme, layout) fallback image, one at a time in a worker thread.
+    Stops early once the cache is full so warm-up never evicts its own work.
+    """
+    themes = [(theme, colors) for theme, _, colors in FALLBACK_THEMES] + [DEFAULT_FALLBACK_THEME]
+    rendered = 0
+    for seed in range(settings.FALLBACK_IMAGE_LAYOUTS):
+        for theme, colors in themes:
+            if (theme, seed) in fallback_image_cache:
+                continue
+            png = await asyncio.to_thread(render_fallback_png, colors, seed)
+            if fallback_image_cache.stats()["bytes"] + len(png) > fallback_image_cache.max_bytes:
+                logger.info(f"Fallback image cache full after warming {rendered} images")
+                return
+            fallback_image_cache.set((theme, seed), png)
+            rendered += 1
+    
+    logger.info(f"✅ Warmed fallback image cache: {rendered} images")
+
+
+# Width in pixels of the soft edge on fallback shapes
+SHAPE_EDGE_SOFTNESS = 5.0
+
+
+def _edge_coverage(distance_inside):
+    """Map signed distance to a shape edge (positive inside) to 0..1 coverage with a soft ramp"""
+    import numpy as np
+    
+    return np.clip(distance_inside / SHAPE_EDGE_SOFTNESS + 0.5, 0.0, 1.0)
+
+
+@functools.lru_cache(maxsize=4)
+def _vignette_shade(width: int, height: int):
+    """Per-pixel brightness factor darkening smoothly towards the nearest edge (up to 30% over 300px)"""
+    import numpy as np
+    
+    dist_x = np.minimum(np.arange(width), np.arange(width)[::-1]).astype(np.float32)
+    dist_y = np.minimum(np.arange(height), np.arange(height)[::-1]).astype(np.float32)
+    edge_distance = np.minimum(dist_y[:, None], dist_x[None, :])
+    shade = 1.0 - 0.3 * np.clip(1.0 - edge_distance / 300.0, 0.0, 1.0)
+    shade.flags.writeable = False
+    return shade
+
+
+def render_fallback_pixels(colors, seed: int, width: int = FALLBACK_WIDTH, height: int = FALLBACK_HEIGHT):
+    """
+    Render the fallback artwork as an RGB uint8 array of shape (height, width, 3).
+    
+    Everything is computed with NumPy array operations: a vertical multi-stop
+    gradient, translucent white ellipses/rectangles with soft edges (later shapes
+    are composited over earlier ones) and a smooth edge vignette, combined in a
+    single compositing pass.
+    
+    Args:
+        colors: 4 RGB gradient stops, top to bottom
+        seed: Seed for the shape layout
+    """
+    import numpy as np
+    import random
+    
+    rng = random.Random(seed)
+    
+    # Vertical gradient through the 4 color stops, one row color per y
+    progress = np.arange(height, dtype=np.float32) / height
+    stops = np.array([0.0, 0.33, 0.66, 1.0], dtype=np.float32)
+    palette = np.array(colors, dtype=np.float32)
+    column = np.stack(
+        [np.interp(progress, stops, palette[:, channel]) for channel in range(3)],
+        axis=-1
+    ).astype(np.float32)
+    
+    # Shape layer: opacity of the translucent white overlay
+    alpha = np.zeros((height, width), dtype=np.float32)
+    margin = int(SHAPE_EDGE_SOFTNESS)
+    
+    def paint(y0, y1, x0, x1, coverage, shape_alpha):
+        region = alpha[y0:y1, x0:x1]
+        region += (shape_alpha - region) * coverage
+    
+    # Circles/ellipses
+    for _ in range(rng.randint(4, 7)):
+        size = rng.randint(150, 450)
+        x = rng.randint(-size // 2, width - size // 2)
+        y = rng.randint(-size // 2, height - size // 2)
+        shape_alpha = rng.randint(10, 35) / 255
+        
+        x0, x1 = max(x - margin, 0), min(x + size + margin, width)
+        y0, y1 = max(y - margin, 0), min(y + size + margin, height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        
+        radius = size / 2
+        dx = np.arange(x0, x1, dtype=np.float32) + 0.5 - (x + radius)
+        dy = np.arange(y0, y1, dtype=np.float32) + 0.5 - (y + radius)
+        distance = np.sqrt(dy[:, None] ** 2 + dx[None, :] ** 2)
+        paint(y0, y1, x0, x1, _edge_coverage(radius - distance), shape_alpha)
+    
+    # Rectangles for variety (coverage is separable: edge ramp in x times ramp in y)
+    for _ in range(rng.randint(2, 5)):
+        w = rng.randint(120, 350)
+        h = rng.randint(120, 300)
+        x = rng.randint(-60, width - w + 60)
+        y = rng.randint(-60, height - h + 60)
+        shape_alpha = rng.randint(8, 25) / 255
+        
+        x0, x1 = max(x - margin, 0), min(x + w + margin, width)
+        y0, y1 = max(y - margin, 0), min(y + h + margin, height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        
+        px = np.arange(x0, x1, dtype=np.float32) + 0.5
+        py = np.arange(y0, y1, dtype=np.float32) + 0.5
+        cover_x = _edge_coverage(np.minimum(px - x, x + w - px))
+        cover_y = _edge_coverage(np.minimum(py - y, y + h - py))
+        paint(y0, y1, x0, x1, cover_y[:, None] * cover_x[None, :], shape_alpha)
+    
+    # Single compositing pass: gradient -> white shapes -> vignette.
+    # Done per channel on contiguous planes, which is much faster than on (h, w, 3) views.
+    shade = _vignette_shade(width, height)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    plane = np.empty((height, width), dtype=np.float32)
+    for channel in range(3):
+        base = column[:, channel][:, None]
+        np.multiply(alpha, 255.0 - base, out=plane)
+        plane += base
+        plane *= shade
+        plane += 0.5
+        pixels[:, :, channel] = plane
+    
+    return pixels
+
+
+def encode_fallback_png(pixels) -> bytes:
+    """
+    Encode rendered pixels as PNG.
+    Uses the default zlib level: optimize=True costs ~4x the encode time for ~13% smaller files.
+    """
+    from PIL import Image
+    
+    buffered = BytesIO()
+    Image.fromarray(pixels, mode="RGB").save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def render_fallback_png(colors, seed: int) -> bytes:
+    return encode_fallback_png(render_fallback_pixels(colors, seed))
+
+
+def render_fallback_image(topic: str) -> bytes:
+    """
+    Render the fallback image (blocking).
     Creates visually appealing abstract art instead of text.
     
     Args:
         topic: Topic text (used for color scheme selection)
         
     Returns:
-        Base64 encoded PNG image
+        PNG bytes
     """
     try:
-        from PIL import Image, ImageDraw, ImageFilter
-        import random
-        
         logger.info("🎨 Generating enhanced visual fallback image...")
         
-        # Create LinkedIn-optimized image
-        width, height = 1200, 630
-        
-        # Determine color scheme based on topic keywords
-        topic_lower = topic.lower()
-        
-        if any(word in topic_lower for word in ['tech', 'ai', 'digital', 'future', 'innovation', 'data', 'software']):
-            # Tech theme: Blue/Cyan/Purple
-            colors = [(30, 64, 175), (59, 130, 246), (139, 92, 246), (168, 85, 247)]
-            theme = "Tech"
-        elif any(word in topic_lower for word in ['health', 'medical', 'care', 'wellness', 'hospital', 'doctor']):
-            # Health theme: Green/Teal
-            colors = [(16, 185, 129), (5, 150, 105), (6, 182, 212), (20, 184, 166)]
-            theme = "Health"
-        elif any(word in topic_lower for word in ['business', 'finance', 'market', 'economy', 'invest', 'money']):
-            # Business theme: Navy/Gold
-            colors = [(30, 58, 138), (37, 99, 235), (251, 191, 36), (245, 158, 11)]
-            theme = "Business"
-        elif any(word in topic_lower for word in ['creative', 'design', 'art', 'brand', 'marketing', 'content']):
-            # Creative theme: Pink/Orange
-            colors = [(236, 72, 153), (219, 39, 119), (249, 115, 22), (251, 146, 60)]
-            theme = "Creative"
-        else:
-            # Default: Professional blue gradient
-            colors = [(30, 64, 175), (37, 99, 235), (59, 130, 246), (96, 165, 250)]
-            theme = "Professional"
-        
+        theme, colors = select_fallback_theme(topic)
         logger.info(f"Using {theme} color theme")
         
-        # Create base image with gradient
-        img = Image.new('RGB', (width, height), colors[0])
-        draw = ImageDraw.Draw(img)
-        
-        # Create smooth multi-color gradient
-        for y in range(height):
-            progress = y / height
-            
-            # Interpolate between multiple colors
-            if progress < 0.33:
-                t = progress * 3
-                r = int(colors[0][0] + (colors[1][0] - colors[0][0]) * t)
-                g = int(colors[0][1] + (colors[1][1] - colors[0][1]) * t)
-                b = int(colors[0][2] + (colors[1][2] - colors[0][2]) * t)
-            elif progress < 0.66:
-                t = (progress - 0.33) * 3
-                r = int(colors[1][0] + (colors[2][0] - colors[1][0]) * t)
-                g = int(colors[1][1] + (colors[2][1] - colors[1][1]) * t)
-                b = int(colors[1][2] + (colors[2][2] - colors[1][2]) * t)
-            else:
-                t = (progress - 0.66) * 3
-                r = int(colors[2][0] + (colors[3][0] - colors[2][0]) * t)
-                g = int(colors[2][1] + (colors[3][1] - colors[2][1]) * t)
-                b = int(colors[2][2] + (colors[3][2] - colors[2][2]) * t)
-            
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
-        
-        # Add abstract geometric shapes for visual interest
-        random.seed(hash(topic) % 1000)  # Consistent randomness per topic
-        
-        # Create a semi-transparent overlay for shapes
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        overlay_draw = ImageDraw.Draw(overlay)
-        
-        # Add circles/ellipses
-        num_shapes = random.randint(4, 7)
-        for _ in range(num_shapes):
-            size = random.randint(150, 450)
-            x = random.randint(-size//2, width - size//2)
-            y = random.randint(-size//2, height - size//2)
-            
-            # Semi-transparent white
-            alpha = random.randint(10, 35)
-            color = (255, 255, 255, alpha)
-            
-            overlay_draw.ellipse([x, y, x + size, y + size], fill=color)
-        
-        # Add rectangles for variety
-        for _ in range(random.randint(2, 5)):
-            w = random.randint(120, 350)
-            h = random.randint(120, 300)
-            x = random.randint(-60, width - w + 60)
-            y = random.randint(-60, height - h + 60)
-            
-            alpha = random.randint(8, 25)
-            color = (255, 255, 255, alpha)
-            
-            overlay_draw.rectangle([x, y, x + w, y + h], fill=color)
-        
-        # Composite the overlay
-        img = img.convert('RGBA')
-        img = Image.alpha_composite(img, overlay)
-        img = img.convert('RGB')
-        
-        # Apply subtle blur for smooth effect
-        img = img.filter(ImageFilter.GaussianBlur(radius=2))
+        # Consistent layout per topic; repeated (theme, layout) pairs come from cache
+        png = get_fallback_png(theme, colors, fallback_seed(topic))
         
-        # Add vignette effect (darker edges)
-        vignette = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        vignette_draw = ImageDraw.Draw(vignette)
-        
-        for i in range(100):
-            alpha = int(i * 0.8)
-            border = i * 3
-            vignette_draw.rectangle(
-                [border, border, width - border, height - border],
-                outline=(0, 0, 0, alpha)
-            )
-        
-        img = img.convert('RGBA')
-        img = Image.alpha_composite(img, vignette)
-        img = img.convert('RGB')
-        
-        # Convert to base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG", optimize=True, quality=95)
-        img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-        
-        logger.info(f"✅ Visual fallback generated: {len(img_base64)} chars, {theme} theme")
-        return img_base64
+        logger.info(f"✅ Visual fallback generated: {len(png)} bytes, {theme} theme")
+        return png
         
     except ImportError:
-        logger.error("PIL not installed, using simple placeholder")
+        logger.error("PIL/NumPy not installed, using simple placeholder")
         return create_simple_placeholder()
     except Exception as e:
         logger.error(f"Error generating fallback: {e}")
         return create_simple_placeholder()
 
 
-def create_simple_placeholder() -> str:
+def create_simple_placeholder() -> bytes:
     """
     Create a minimal placeholder if all else fails.
-    Returns a small colored rectangle as base64 PNG.
+    Returns a small colored rectangle as PNG bytes.
     """
     logger.info("Using simple placeholder image")
     # 1200x630 blue rectangle as base64 PNG (pre-encoded)
-    return """
-iVBORw0KGgoAAAANSUhEUgAABLAAAAJ2CAYAAABKhVbeAAAACXBIWXMAAAsTAAALEwEAmpwYAAAD
-CElEQVR4nO3BMQEAAADCoPVPbQwfoAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
-AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAoAMN
-yAABEgjdigAAAABJRU5ErkJggg==
-""".strip().replace('\n', '')
\ No newline at end of file
+    return base64.b64decode(SIMPLE_PLACEHOLDER_PNG_BASE64)
+
+
+SIMPLE_PLACEHOLDER_PNG_BASE64 = """
+iVBORw0KGgoAAAANSUhEUgAABLAAAAJ2AQMAAAB1jukfAAAAA1BMVEUlY+vg9LpFAAAAc0lEQVR4
+2u3BAQ0AAADCoPdPbQ43oAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
+AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAXg1zqQAB
+6RqMPAAAAABJRU5ErkJggg==
+""".strip().replace('\n', '')
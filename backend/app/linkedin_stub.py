@@ -1,40 +1,34 @@
-import json
+import asyncio
 from datetime import datetime
 from typing import Dict
 import logging
-from .utils import read_posts_log, write_posts_log
+from .utils import append_post, get_post_store
 
 logger = logging.getLogger(__name__)
 
-def save_approved_post(topic: str, text: str, image: str) -> None:
+async def save_approved_post(topic: str, text: str, image_hash: str) -> None:
     """
-    Simulates posting to LinkedIn by saving the approved post to a JSON log file
+    Simulates posting to LinkedIn by appending the approved post to the post log
     
     Args:
         topic: The topic of the post
         text: The generated post text
-        image: Base64 encoded image
+        image_hash: Content hash of the image in the blob store
     """
     try:
-        # Read existing posts
-        posts = read_posts_log()
-        
         # Create new post entry
         new_post = {
             "topic": topic,
             "text": text,
-            "image": image,
+            "image_hash": image_hash,
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "status": "published"
         }
         
-        # Append to posts list
-        posts.append(new_post)
-        
-        # Write back to file
-        write_posts_log(posts)
+        # Append to the log through the writer task (group commit, constant cost)
+        new_post = await append_post(new_post)
         
-        logger.info(f"Post saved successfully. Total posts: {len(posts)}")
+        logger.info(f"Post {new_post['id']} saved successfully")
         
         # Simulate LinkedIn API call (in real implementation, this would call LinkedIn API)
         _simulate_linkedin_post(new_post)
@@ -58,13 +52,13 @@ def _simulate_linkedin_post(post: Dict) -> None:
     logger.info(f"Topic: {post['topic']}")
     logger.info(f"Timestamp: {post['timestamp']}")
     logger.info(f"Text preview: {post['text'][:100]}...")
-    logger.info(f"Image included: {'Yes' if post['image'] else 'No'}")
+    logger.info(f"Image included: {'Yes' if post.get('image_hash') else 'No'}")
     logger.info("=" * 50)
     logger.info("✅ Post successfully published to LinkedIn (simulated)")
     logger.info("=" * 50)
 
 
-def get_post_stats() -> Dict:
+async def get_post_stats() -> Dict:
     """
     Get statistics about published posts
     
@@ -72,17 +66,12 @@ def get_post_stats() -> Dict:
         Dict with post statistics
     """
     try:
-        posts = read_posts_log()
-        
-        return {
-            "total_posts": len(posts),
-            "latest_post": posts[-1] if posts else None,
-            "oldest_post": posts[0] if posts else None
-        }
+        return await asyncio.to_thread(lambda: get_post_store().stats())
     except Exception as e:
         logger.error(f"Error getting stats: {str(e)}")
         return {
             "total_posts": 0,
+            "by_status": {},
             "latest_post": None,
             "oldest_post": None
         }
\ No newline at end of file
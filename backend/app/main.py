@@ -3,6 +3,7 @@ FastAPI Backend for LinkedIn Post Generator
 Main application entry point with Authentication
 """
 
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,10 +12,22 @@ from contextlib import asynccontextmanager
 from app.api.generate import router as generate_router
 from app.api.rewrite import router as rewrite_router
 from app.api.generate_topic import router as topic_router
+from app.api.generate_batch import router as batch_router, expire_batch_jobs
 from app.api.edit_actions import router as edit_router
 from app.api.generate_from_reference import router as reference_router
+from app.api.jobs import router as jobs_router
+from app.api.images import router as images_router
+from app.api.posts import router as posts_router
 from app.auth.routes import router as auth_router
 from app.auth.service import auth_service
+from app.auth.activity import activity_tracker
+from app.core.security import password_pool
+from app.config import settings
+from app.gemini_client import warm_fallback_image_cache
+from app.utils import start_post_log, stop_post_log
+from app.services.llm_manager import llm_manager
+from app.services.jobs import job_manager
+from app.services.image_pipeline import image_pipeline
 from app.users.routes import router as user_router
 
 
@@ -22,13 +35,37 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await auth_service.connect_db()
+    await activity_tracker.start(auth_service.users_collection)
+    await llm_manager.start()
+    await job_manager.start()
+    image_pipeline.start()
+    await start_post_log()
+    await asyncio.to_thread(expire_batch_jobs)
+    warmup_task = None
+    if settings.FALLBACK_IMAGE_WARMUP:
+        warmup_task = asyncio.create_task(warm_fallback_image_cache())
     yield
     # Shutdown
+    if warmup_task:
+        warmup_task.cancel()
+        try:
+            await warmup_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Fallback image warm-up failed: {str(e)}")
+    await stop_post_log()
+    image_pipeline.close()
+    await job_manager.stop()
+    await llm_manager.close()
+    await activity_tracker.stop()
+    password_pool.close()
     await auth_service.close_db()
 
 app = FastAPI(
@@ -65,8 +102,12 @@ app.include_router(
 # Generation routes
 app.include_router(generate_router, prefix="/api", tags=["Generate"])
 app.include_router(topic_router, prefix="/api", tags=["Topic Generation"])
+app.include_router(batch_router, prefix="/api", tags=["Batch Generation"])
 app.include_router(reference_router, prefix="/api", tags=["Style Transfer"])
 app.include_router(edit_router, prefix="/api", tags=["Post Editing"])
+app.include_router(jobs_router, prefix="/api", tags=["Background Jobs"])
+app.include_router(images_router, prefix="/api", tags=["Images"])
+app.include_router(posts_router, prefix="/api", tags=["Posts"])
 app.include_router(rewrite_router, prefix="/api", tags=["Rewrite (Legacy)"])
 
 @app.get("/")
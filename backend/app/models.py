@@ -6,7 +6,7 @@ class LinkedInPost(BaseModel):
     """Model for a LinkedIn post"""
     topic: str = Field(..., description="The topic of the post")
     text: str = Field(..., description="The generated post content")
-    image: str = Field(..., description="Base64 encoded image")
+    image_hash: str = Field(..., description="Image content hash, served from /api/images/{image_hash}")
     timestamp: Optional[str] = Field(None, description="ISO 8601 timestamp")
     status: str = Field(default="draft", description="Post status: draft, approved, published")
 
@@ -24,13 +24,13 @@ class GenerationRequest(BaseModel):
 class GenerationResponse(BaseModel):
     """Response model for generated content"""
     text: str = Field(..., description="Generated LinkedIn post text")
-    image: str = Field(..., description="Base64 encoded generated image")
+    image_hash: str = Field(..., description="Generated image content hash, served from /api/images/{image_hash}")
     
 class ApprovalRequest(BaseModel):
     """Request model for approving a post"""
     topic: str = Field(..., description="The topic of the post")
     text: str = Field(..., description="The post content")
-    image: str = Field(..., description="Base64 encoded image")
+    image_hash: str = Field(..., pattern=r"^[a-f0-9]{64}$", description="Image content hash from the generation response")
     
 class ApprovalResponse(BaseModel):
     """Response model for approval"""
@@ -40,5 +40,6 @@ class ApprovalResponse(BaseModel):
 
 class PostListResponse(BaseModel):
     """Response model for listing posts"""
-    posts: list = Field(..., description="List of published posts")
-    total: int = Field(..., description="Total number of posts")
\ No newline at end of file
+    posts: list = Field(..., description="One page of posts, newest first")
+    total: int = Field(..., description="Total number of posts (before filters)")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
\ No newline at end of file
@@ -0,0 +1,522 @@
+import base64
+import binascii
+import bisect
+import json
+import logging
+import os
+import asyncio
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl  # Cross-process file locks (Unix only)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Characters of post text kept in the index for summary listings
+PREVIEW_LENGTH = 140
+
+# Sort key of a post in the index: newest last
+PostKey = Tuple[str, str]  # (timestamp, id)
+
+
+class PostMeta(NamedTuple):
+    """Indexed fields of a post, enough to list it without reading the log"""
+    timestamp: str
+    status: str
+    topic: str
+    image_hash: Optional[str]
+    preview: str
+
+    @property
+    def topic_key(self) -> str:
+        return normalize_topic(self.topic)
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def encode_cursor(key: PostKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> PostKey:
+    """Raises ValueError for malformed cursors"""
+    try:
+        timestamp, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return str(timestamp), str(post_id)
+
+
+class PostStore:
+    """
+    Append-only JSON Lines store for published posts
+
+    Every post is one line; new posts are appended under an exclusive file
+    lock, so approvals cost the same regardless of history size and are safe
+    across uvicorn worker processes. Deletions append a tombstone; compact()
+    rewrites the file with only live posts.
+
+    An in-memory index maps post id -> (offset, length) of its line, so single
+    posts are read with one seek. Lines appended by other processes are picked
+    up incrementally on the next access.
+
+    Posts are also indexed by timestamp, status and topic (sorted key lists),
+    which gives cursor-paginated, filtered listings and O(1) stats without
+    scanning the log. Summary listings are served from the index alone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, Tuple[int, int]] = {}  # id -> (offset, length), insertion ordered
+        self._meta: Dict[str, PostMeta] = {}
+        self._timeline: List[PostKey] = []  # All posts, sorted oldest first
+        self._by_status: Dict[str, List[PostKey]] = {}
+        self._by_topic: Dict[str, List[PostKey]] = {}
+        self._indexed_end = 0
+        self._file_id: Optional[Tuple[int, int]] = None
+
+    # -------------------------
+    # File locking and index maintenance
+    # -------------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Lock the log across processes (no-op where fcntl is unavailable)"""
+        lock_path = self.path + ".lock"
+        with open(lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Bring the index up to date with the file (caller holds both locks)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._clear_index()
+            self._indexed_end = 0
+            self._file_id = None
+            return
+
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._indexed_end:
+            # Replaced by compaction (possibly in another process): rebuild
+            self._clear_index()
+            self._indexed_end = 0
+            self._file_id = file_id
+
+        if stat.st_size == self._indexed_end:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._indexed_end)
+            offset = self._indexed_end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write from a crashed writer; ignored until completed
+                self._index_line(line, offset)
+                offset += len(line)
+        self._indexed_end = offset
+
+    def _index_line(self, line: bytes, offset: int):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping corrupt post log line at offset {offset}")
+            return
+
+        post_id = record.get("id")
+        if not post_id:
+            return
+
+        if post_id in self._offsets:
+            self._unindex(post_id)  # Deleted or superseded by this line
+        if not record.get("deleted"):
+            self._offsets[post_id] = (offset, len(line))
+            self._index_post(post_id, record)
+
+    def _clear_index(self):
+        self._offsets.clear()
+        self._meta.clear()
+        self._timeline.clear()
+        self._by_status.clear()
+        self._by_topic.clear()
+
+    def _index_post(self, post_id: str, record: Dict):
+        meta = PostMeta(
+            timestamp=record.get("timestamp") or "",
+            status=record.get("status") or "",
+            topic=record.get("topic") or "",
+            image_hash=record.get("image_hash"),
+            preview=(record.get("text") or "")[:PREVIEW_LENGTH]
+        )
+        self._meta[post_id] = meta
+
+        key = (meta.timestamp, post_id)
+        bisect.insort(self._timeline, key)
+        bisect.insort(self._by_status.setdefault(meta.status, []), key)
+        bisect.insort(self._by_topic.setdefault(meta.topic_key, []), key)
+
+    def _unindex(self, post_id: str):
+        self._offsets.pop(post_id, None)
+        meta = self._meta.pop(post_id)
+        key = (meta.timestamp, post_id)
+
+        for keys, index, name in (
+            (self._timeline, None, None),
+            (self._by_status.get(meta.status), self._by_status, meta.status),
+            (self._by_topic.get(meta.topic_key), self._by_topic, meta.topic_key),
+        ):
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+            if index is not None and not keys:
+                del index[name]
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        with self._lock, self._file_lock(exclusive):
+            self._refresh()
+            yield
+
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _append_lines(self, records: List[Dict]):
+        """Append records in a single write (caller holds the exclusive lock)"""
+        data = b"".join(self._encode(record) for record in records)
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self._indexed_end:
+            data = b"\n" + data  # Terminate a torn line left by a crashed writer
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._refresh()
+
+    def _read_at(self, f, offset: int, length: int) -> Dict:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def append(self, post: Dict) -> Dict:
+        """Append a post (an id is assigned if missing) and return it"""
+        return self.append_many([post])[0]
+
+    def append_many(self, posts: List[Dict]) -> List[Dict]:
+        """Append several posts with a single write and fsync (group commit)"""
+        records = []
+        for post in posts:
+            record = dict(post)
+            record.setdefault("id", uuid.uuid4().hex)
+            records.append(record)
+
+        with self._locked(exclusive=True):
+            self._append_lines(records)
+        return records
+
+    def delete(self, post_id: str) -> bool:
+        with self._locked(exclusive=True):
+            if post_id not in self._offsets:
+                return False
+            self._append_lines([{"id": post_id, "deleted": True}])
+        return True
+
+    def get(self, post_id: str) -> Optional[Dict]:
+        with self._locked():
+            location = self._offsets.get(post_id)
+            if location is None:
+                return None
+            with open(self.path, "rb") as f:
+                return self._read_at(f, *location)
+
+    def iter_posts(self) -> Iterator[Dict]:
+        """
+        Live posts in insertion order. The file is opened under the lock, so
+        the iteration keeps reading a consistent snapshot even if the log is
+        compacted (replaced) meanwhile.
+        """
+        with self._locked():
+            locations = list(self._offsets.values())
+            if not locations:
+                return
+            f = open(self.path, "rb")
+
+        with f:
+            for offset, length in locations:
+                yield self._read_at(f, offset, length)
+
+    def read_all(self) -> List[Dict]:
+        return list(self.iter_posts())
+
+    def count(self) -> int:
+        with self._locked():
+            return len(self._offsets)
+
+    def _summary(self, post_id: str) -> Dict:
+        meta = self._meta[post_id]
+        return {
+            "id": post_id,
+            "topic": meta.topic,
+            "timestamp": meta.timestamp,
+            "status": meta.status,
+            "image_hash": meta.image_hash,
+            "preview": meta.preview
+        }
+
+    def query(
+        self,
+        limit: Optional[int] = 20,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        topic: Optional[str] = None,
+        summary: bool = False
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List posts newest first, optionally filtered by status and/or topic
+        (case-insensitive exact match).
+
+        Args:
+            limit: Page size (None for everything after the cursor)
+            cursor: next_cursor from the previous page
+            status: Only posts with this status
+            topic: Only posts with this topic
+            summary: Return index fields only (no log reads, no full text or images)
+
+        Returns:
+            (posts, next_cursor); next_cursor is None on the last page
+        """
+        after = decode_cursor(cursor) if cursor else None
+        topic_key = normalize_topic(topic) if topic is not None else None
+
+        with self._locked():
+            # Walk the smallest matching index, check the other filter on metadata
+            candidates = [self._timeline]
+            if status is not None:
+                candidates.append(self._by_status.get(status, []))
+            if topic_key is not None:
+                candidates.append(self._by_topic.get(topic_key, []))
+            keys = min(candidates, key=len)
+
+            position = bisect.bisect_left(keys, after) if after else len(keys)
+            page: List[str] = []
+            next_cursor = None
+            while position > 0:
+                position -= 1
+                timestamp, post_id = keys[position]
+                meta = self._meta[post_id]
+                if status is not None and meta.status != status:
+                    continue
+                if topic_key is not None and meta.topic_key != topic_key:
+                    continue
+                if limit is not None and len(page) == limit:
+                    next_cursor = encode_cursor(self._key(page[-1]))
+                    break
+                page.append(post_id)
+
+            if summary:
+                return [self._summary(post_id) for post_id in page], next_cursor
+
+            locations = [self._offsets[post_id] for post_id in page]
+            f = open(self.path, "rb") if locations else None
+
+        if f is None:
+            return [], next_cursor
+        with f:
+            return [self._read_at(f, offset, length) for offset, length in locations], next_cursor
+
+    def _key(self, post_id: str) -> PostKey:
+        return self._meta[post_id].timestamp, post_id
+
+    def stats(self) -> Dict:
+        """Totals and oldest/latest posts in O(1) from the index"""
+        with self._locked():
+            if not self._timeline:
+                return {"total_posts": 0, "by_status": {}, "latest_post": None, "oldest_post": None}
+
+            by_status = {status: len(keys) for status, keys in self._by_status.items()}
+            oldest = self._offsets[self._timeline[0][1]]
+            latest = self._offsets[self._timeline[-1][1]]
+            with open(self.path, "rb") as f:
+                return {
+                    "total_posts": len(self._timeline),
+                    "by_status": by_status,
+                    "latest_post": self._read_at(f, *latest),
+                    "oldest_post": self._read_at(f, *oldest)
+                }
+
+    def replace_all(self, posts: List[Dict]):
+        """Atomically replace the whole log with the given posts"""
+        records = []
+        for post in posts:
+            record = dict(post)
+            record.setdefault("id", uuid.uuid4().hex)
+            records.append(record)
+
+        with self._locked(exclusive=True):
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                for record in records:
+                    f.write(self._encode(record))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._refresh()
+
+    def compact(self) -> int:
+        """
+        Rewrite the log with only live posts (drops tombstones and superseded
+        lines). Returns the number of bytes reclaimed.
+        """
+        with self._locked(exclusive=True):
+            if not os.path.exists(self.path):
+                return 0
+
+            before = self._indexed_end
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+                for offset, length in self._offsets.values():
+                    src.seek(offset)
+                    dst.write(src.read(length))
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, self.path)
+            self._refresh()
+            reclaimed = before - self._indexed_end
+
+        logger.info(f"Compacted post log, reclaimed {reclaimed} bytes")
+        return reclaimed
+
+    def migrate_from_json(self, legacy_path: str) -> int:
+        """
+        Import posts from the legacy {"posts": [...]} JSON file, once: only
+        while the post log does not exist yet. Embedded base64 images are
+        moved to the blob store. The legacy file is left in place (it may be
+        tracked by git). Returns the number of posts imported.
+        """
+        from app.services.blob_store import blob_store
+
+        with self._locked(exclusive=True):
+            if not os.path.exists(legacy_path) or os.path.exists(self.path):
+                return 0
+
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    posts = json.load(f).get("posts", [])
+            except json.JSONDecodeError:
+                logger.warning("Invalid JSON in legacy posts log, skipping migration")
+                return 0
+
+            records = []
+            for post in posts:
+                record = dict(post)
+                record.setdefault("id", uuid.uuid4().hex)
+                image = record.pop("image", None)
+                if image and "image_hash" not in record:
+                    try:
+                        record["image_hash"] = blob_store.put(base64.b64decode(image))
+                    except (binascii.Error, ValueError):
+                        logger.warning(f"Dropping undecodable image of post {record['id']}")
+                records.append(record)
+
+            # Creates the log even with no posts, which marks the import as done
+            self._append_lines(records)
+
+        logger.info(f"Migrated {len(records)} posts from {legacy_path}")
+        return len(records)
+
+
+class PostWriter:
+    """
+    Single writer task in front of a PostStore
+
+    Appends are queued and the writer commits everything that queued up while
+    the previous fsync was running as one batch, so a burst of approvals costs
+    one write + fsync instead of one each. Disk I/O runs in a worker thread and
+    never blocks the event loop.
+    """
+
+    def __init__(self, store: PostStore, max_batch: int = 100):
+        self.store = store
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.written = 0
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Commit everything still queued, then stop the writer"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+
+    async def append(self, post: Dict) -> Dict:
+        """Queue a post and wait until it is durably written; returns the stored record"""
+        if self._task is None:
+            # Writer not running (scripts, tests): write directly, still off the event loop
+            return await asyncio.to_thread(self.store.append, post)
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((post, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                records = await asyncio.to_thread(self.store.append_many, [post for post, _ in batch])
+            except Exception as e:
+                logger.error(f"Post log write failed: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                self.batches += 1
+                self.written += len(records)
+                for (_, future), record in zip(batch, records):
+                    if not future.done():
+                        future.set_result(record)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "written": self.written
+        }
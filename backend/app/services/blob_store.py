@@ -0,0 +1,99 @@
+"""
+Content-addressed blob store for generated images
+Blobs are stored once on disk under their SHA-256 and referenced by hash,
+so identical images are deduplicated and URLs can be cached forever
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BLOB_HASH_PATTERN = re.compile(r"^[a-f0-9]{64}$")
+
+# Leading bytes -> media type, for the image formats we produce
+_MAGIC_TYPES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+]
+
+
+def is_blob_hash(value: str) -> bool:
+    return bool(BLOB_HASH_PATTERN.match(value))
+
+
+def sniff_media_type(header: bytes) -> str:
+    """Media type from the first bytes of a blob"""
+    for magic, media_type in _MAGIC_TYPES:
+        if header.startswith(magic):
+            return media_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return "application/octet-stream"
+
+
+class BlobStore:
+    """All methods except put_async are blocking"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, blob_hash: str) -> str:
+        """Sharded path: <root>/ab/cd/abcd...; two levels keep directories small"""
+        return os.path.join(self.root, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    def exists(self, blob_hash: str) -> bool:
+        return is_blob_hash(blob_hash) and os.path.exists(self.path(blob_hash))
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its hash; storing the same bytes again is a no-op"""
+        blob_hash = hashlib.sha256(data).hexdigest()
+        path = self.path(blob_hash)
+        if os.path.exists(path):
+            return blob_hash
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temp file in the same directory and rename, so readers
+        # never see a partially written blob
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        logger.info(f"Stored blob {blob_hash[:12]} ({len(data)} bytes)")
+        return blob_hash
+
+    async def put_async(self, data: bytes) -> str:
+        return await asyncio.to_thread(self.put, data)
+
+    def get(self, blob_hash: str) -> Optional[bytes]:
+        if not self.exists(blob_hash):
+            return None
+        with open(self.path(blob_hash), "rb") as f:
+            return f.read()
+
+    def media_type(self, blob_hash: str) -> str:
+        with open(self.path(blob_hash), "rb") as f:
+            return sniff_media_type(f.read(16))
+
+
+blob_store = BlobStore(settings.BLOB_STORE_DIR)
@@ -0,0 +1,137 @@
+"""
+Session-scoped Ollama chat context
+Remembers the last conversation per requester so a follow-up edit of the post
+the model just wrote is sent as the next chat turn. The earlier messages are
+then a byte-identical prefix of the new request, and Ollama (with keep_alive
+holding the model loaded) reuses their evaluated KV cache instead of
+re-processing the system prompt and post text.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.config import settings
+from app.services.ollama_client import chat_messages
+from app.services.prompt_budget import estimate_tokens, prompt_token_budget
+
+logger = logging.getLogger(__name__)
+
+# Stands in for the post text when an edit continues the conversation
+PREVIOUS_POST = "(the post from your previous reply)"
+
+Message = Dict[str, str]
+
+
+class ChatSession:
+    __slots__ = ("messages", "system", "last_output", "expires_at")
+
+    def __init__(self, messages: List[Message], system: Optional[str], last_output: str, expires_at: float):
+        self.messages = messages
+        self.system = system
+        self.last_output = last_output
+        self.expires_at = expires_at
+
+
+class ChatSessionStore:
+    """In-process LRU of chat sessions with an idle TTL"""
+
+    def __init__(self, max_sessions: int, ttl: int, max_turns: int):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.continued = 0
+        self.started = 0
+
+    def _get(self, key: str) -> Optional[ChatSession]:
+        session = self._sessions.get(key)
+        if session is None:
+            return None
+
+        if session.expires_at < time.monotonic():
+            del self._sessions[key]
+            return None
+
+        self._sessions.move_to_end(key)
+        return session
+
+    def continuation(
+        self,
+        key: str,
+        content: str,
+        system: Optional[str],
+        followup: str,
+        max_tokens: int
+    ) -> Optional[List[Message]]:
+        """
+        Messages continuing key's conversation with followup, if content is
+        the post the model produced last and the history still fits the
+        prompt budget; None if the request has to start a new conversation.
+        The instructions of a different system prompt are put into the user
+        turn so the earlier messages stay an unchanged prefix.
+        """
+        session = self._get(key)
+        if session is None or session.last_output.strip() != content.strip():
+            return None
+
+        turns = sum(1 for message in session.messages if message["role"] == "user")
+        if turns >= self.max_turns:
+            return None
+
+        if system and system != session.system:
+            followup = f"{system}\n\n{followup}"
+        messages = session.messages + [{"role": "user", "content": followup}]
+
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        if prompt_tokens > prompt_token_budget(max_tokens):
+            return None
+        return messages
+
+    def record(
+        self,
+        key: str,
+        provider: str,
+        system: Optional[str],
+        prompt: str,
+        output: str,
+        messages: Optional[List[Message]] = None
+    ):
+        """
+        Remember the conversation that produced output: messages if the
+        request continued the session, else the standalone system + prompt.
+        Answers from other providers are not in Ollama's KV cache, so they
+        end the session instead.
+        """
+        if provider != "ollama":
+            self.discard(key)
+            return
+
+        if messages is not None and key in self._sessions:
+            system = self._sessions[key].system
+            self.continued += 1
+        else:
+            messages = chat_messages(prompt, system)
+            self.started += 1
+
+        history = messages + [{"role": "assistant", "content": output}]
+        self._sessions[key] = ChatSession(history, system, output, time.monotonic() + self.ttl)
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def discard(self, key: str):
+        self._sessions.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "started": self.started,
+            "continued": self.continued,
+        }
+
+
+chat_sessions = ChatSessionStore(
+    max_sessions=settings.CHAT_SESSION_MAX_ENTRIES,
+    ttl=settings.CHAT_SESSION_TTL,
+    max_turns=settings.CHAT_SESSION_MAX_TURNS
+)
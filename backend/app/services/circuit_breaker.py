@@ -0,0 +1,110 @@
+"""
+Per-provider circuit breaker
+Tracks recent call outcomes and stops routing to a provider while it is
+failing, so an outage costs one fast skip instead of a timeout per request
+"""
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"        # Healthy, all requests go through
+    OPEN = "open"            # Unhealthy, requests skip this provider
+    HALF_OPEN = "half_open"  # Recovering, a single trial request is allowed
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window_size: int = settings.CIRCUIT_WINDOW_SIZE,
+        min_calls: int = settings.CIRCUIT_MIN_CALLS,
+        failure_rate: float = settings.CIRCUIT_FAILURE_RATE,
+        open_seconds: int = settings.CIRCUIT_OPEN_SECONDS
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.state = BreakerState.CLOSED
+        self._results: deque = deque(maxlen=window_size)
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be sent to this provider now"""
+        if self.state == BreakerState.OPEN:
+            # Without a successful probe, retry after the cool-down anyway
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self._transition(BreakerState.HALF_OPEN)
+
+        if self.state == BreakerState.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+
+        return True
+
+    def is_blocking(self) -> bool:
+        """Like allow_request, but without claiming the half-open trial slot"""
+        if self.state == BreakerState.OPEN:
+            return time.monotonic() - self._opened_at < self.open_seconds
+        return self.state == BreakerState.HALF_OPEN and self._trial_in_flight
+
+    def record_success(self):
+        if self.state == BreakerState.HALF_OPEN:
+            self._transition(BreakerState.CLOSED)
+            return
+        self._results.append(True)
+
+    def record_failure(self):
+        if self.state == BreakerState.HALF_OPEN:
+            self._transition(BreakerState.OPEN)
+            return
+
+        self._results.append(False)
+        if len(self._results) >= self.min_calls and self.current_failure_rate() >= self.failure_rate:
+            self._transition(BreakerState.OPEN)
+
+    def release(self):
+        """Free the half-open trial slot when a call ends without an outcome (e.g. cancelled)"""
+        self._trial_in_flight = False
+
+    def probe_succeeded(self):
+        """A background health probe reached the provider: let a trial request through"""
+        if self.state == BreakerState.OPEN:
+            self._transition(BreakerState.HALF_OPEN)
+
+    def current_failure_rate(self) -> float:
+        if not self._results:
+            return 0.0
+        return self._results.count(False) / len(self._results)
+
+    def _transition(self, state: BreakerState):
+        if state == self.state:
+            return
+
+        logger.warning(f"Circuit for {self.name}: {self.state.value} → {state.value}")
+        self.state = state
+        self._trial_in_flight = False
+
+        if state == BreakerState.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == BreakerState.CLOSED:
+            self._results.clear()
+            self._opened_at = None
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state.value,
+            "failure_rate": round(self.current_failure_rate(), 3),
+            "calls_in_window": len(self._results),
+            "open_for_seconds": round(time.monotonic() - self._opened_at, 1) if self._opened_at else None
+        }
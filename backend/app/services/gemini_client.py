@@ -2,9 +2,11 @@
 Google Gemini client for fallback AI generation
 """
 import aiohttp
+import json
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
 from app.config import settings
+from app.services.http_pool import create_session
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +15,61 @@ class GeminiClient:
         self.api_key = settings.GEMINI_API_KEY
         self.model = settings.GEMINI_MODEL
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self.temperature = 0.7
+        self.top_p = 0.9
+        self._session: Optional[aiohttp.ClientSession] = None
     
-    async def generate(self, prompt: str, system: Optional[str] = None) -> Optional[str]:
+    async def start(self):
+        """Open the pooled HTTP session (called from the app lifespan)"""
+        if self._session is None or self._session.closed:
+            self._session = create_session(settings.GEMINI_MAX_CONNECTIONS)
+            logger.info("Gemini connection pool opened")
+    
+    async def close(self):
+        """Close the pooled HTTP session and release its connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("Gemini connection pool closed")
+        self._session = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Lazily open the pool when used outside the app lifespan (scripts, tests)
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+    
+    def _build_payload(self, prompt: str, system: Optional[str], max_tokens: Optional[int] = None) -> dict:
+        # Combine system and user prompt
+        full_prompt = prompt
+        if system:
+            full_prompt = f"{system}\n\n{prompt}"
+        
+        return {
+            "contents": [{
+                "parts": [{
+                    "text": full_prompt
+                }]
+            }],
+            "generationConfig": {
+                "temperature": self.temperature,
+                "topP": self.top_p,
+                # Thinking tokens count against the limit on Gemini 2.5
+                "maxOutputTokens": (max_tokens or 2048) + settings.GEMINI_THINKING_TOKENS,
+            }
+        }
+    
+    @staticmethod
+    def _extract_text(data: dict) -> Optional[str]:
+        """Pull the first text part out of a Gemini response (or stream chunk)"""
+        if "candidates" in data and len(data["candidates"]) > 0:
+            candidate = data["candidates"][0]
+            if "content" in candidate and "parts" in candidate["content"]:
+                parts = candidate["content"]["parts"]
+                if len(parts) > 0 and "text" in parts[0]:
+                    return parts[0]["text"]
+        return None
+    
+    async def generate(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None) -> Optional[str]:
         """
         Generate text using Google Gemini
         Returns None if generation fails
@@ -25,53 +80,82 @@ class GeminiClient:
         
         try:
             url = f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
-            
-            # Combine system and user prompt
-            full_prompt = prompt
-            if system:
-                full_prompt = f"{system}\n\n{prompt}"
-            
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": full_prompt
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "topP": 0.9,
-                    "maxOutputTokens": 2048,
-                }
-            }
+            payload = self._build_payload(prompt, system, max_tokens)
             
             timeout = aiohttp.ClientTimeout(total=30)
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        # Extract text from Gemini response
-                        if "candidates" in data and len(data["candidates"]) > 0:
-                            candidate = data["candidates"][0]
-                            if "content" in candidate and "parts" in candidate["content"]:
-                                parts = candidate["content"]["parts"]
-                                if len(parts) > 0 and "text" in parts[0]:
-                                    result = parts[0]["text"].strip()
-                                    logger.info(f"Gemini generation successful. Length: {len(result)}")
-                                    return result
-                        
-                        logger.warning("Gemini response had unexpected format")
-                        return None
-                    else:
-                        error_text = await response.text()
-                        logger.warning(f"Gemini returned status {response.status}: {error_text}")
-                        return None
-                        
+            session = await self._get_session()
+            
+            async with session.post(url, json=payload, timeout=timeout) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    # Extract text from Gemini response
+                    text = self._extract_text(data)
+                    if text is not None:
+                        result = text.strip()
+                        logger.info(f"Gemini generation successful. Length: {len(result)}")
+                        return result
+                    
+                    logger.warning("Gemini response had unexpected format")
+                    return None
+                else:
+                    error_text = await response.text()
+                    logger.warning(f"Gemini returned status {response.status}: {error_text}")
+                    return None
+                    
         except Exception as e:
             logger.error(f"Gemini error: {str(e)}")
             return None
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated tokens from Gemini via streamGenerateContent (SSE).
+        Raises if Gemini is not configured or the request fails.
+        """
+        if not self.api_key:
+            raise RuntimeError("Gemini API key not configured")
+        
+        url = f"{self.base_url}/models/{self.model}:streamGenerateContent?alt=sse&key={self.api_key}"
+        payload = self._build_payload(prompt, system, max_tokens)
+        
+        timeout = aiohttp.ClientTimeout(total=30)
+        session = await self._get_session()
+        
+        async with session.post(url, json=payload, timeout=timeout) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise RuntimeError(f"Gemini returned status {response.status}: {error_text}")
+            
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                
+                text = self._extract_text(json.loads(line[5:]))
+                if text:
+                    yield text
+    
+    async def is_available(self) -> bool:
+        """Check if Gemini is configured and the model endpoint is reachable"""
+        if not self.is_configured():
+            return False
+        
+        try:
+            url = f"{self.base_url}/models/{self.model}?key={self.api_key}"
+            timeout = aiohttp.ClientTimeout(total=5)
+            session = await self._get_session()
+            
+            async with session.get(url, timeout=timeout) as response:
+                return response.status == 200
+        except:
+            return False
+    
     def is_configured(self) -> bool:
         """Check if Gemini is properly configured"""
         return self.api_key is not None and len(self.api_key) > 0
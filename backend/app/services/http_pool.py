@@ -0,0 +1,23 @@
+"""
+Shared aiohttp connection pools for the LLM provider clients
+"""
+import aiohttp
+from app.config import settings
+
+
+def create_session(max_connections: int) -> aiohttp.ClientSession:
+    """
+    Create a long-lived ClientSession backed by a keep-alive connection pool.
+    Request timeouts are passed per call, so the session itself has none.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=max_connections,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+        use_dns_cache=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=None),
+    )
@@ -0,0 +1,247 @@
+"""
+Image post-processing: format variants and preview thumbnails
+Variants of a stored image are encoded on first request in a process pool,
+stored in the blob store like any other image and recorded in a per-image
+manifest, so each (format, size) is only ever encoded once
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional
+from app.config import settings
+from app.services.blob_store import blob_store
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+SIZE_FULL = "full"
+SIZE_THUMB = "thumb"
+IMAGE_SIZES = (SIZE_FULL, SIZE_THUMB)
+
+MEDIA_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+}
+
+# Encoder settings per output format
+ENCODE_OPTIONS = {
+    "avif": {"format": "AVIF", "quality": 60},
+    "webp": {"format": "WEBP", "quality": 82, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 85},
+    "png": {"format": "PNG"},
+    "gif": {"format": "GIF"},
+}
+
+
+def _supported_formats() -> List[str]:
+    """Output formats this Pillow build can encode, most compact first"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return []
+
+    Image.init()
+    return [name for name in ("avif", "webp", "jpeg", "png") if ENCODE_OPTIONS[name]["format"] in Image.SAVE]
+
+
+def encode_variant(data: bytes, output_format: str, max_width: Optional[int]) -> bytes:
+    """
+    Re-encode an image, optionally downscaled to max_width.
+    Runs in a worker process: module-level and only takes/returns bytes.
+    """
+    from PIL import Image
+
+    img = Image.open(BytesIO(data))
+    if max_width and img.width > max_width:
+        height = max(1, round(img.height * max_width / img.width))
+        # reducing_gap does a fast integer downscale first, then a small LANCZOS resample
+        img = img.resize((max_width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    if output_format == "jpeg" and img.mode != "RGB":
+        img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA", "L"):
+        img = img.convert("RGBA")
+
+    buffered = BytesIO()
+    img.save(buffered, **ENCODE_OPTIONS[output_format])
+    return buffered.getvalue()
+
+
+def _parse_accept(accept: Optional[str]) -> Dict[str, float]:
+    """Accept header -> {media range: q}"""
+    ranges: Dict[str, float] = {}
+    for part in (accept or "").split(","):
+        fields = [field.strip() for field in part.split(";")]
+        media_range = fields[0].lower()
+        if not media_range:
+            continue
+
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        ranges[media_range] = max(q, ranges.get(media_range, 0.0))
+    return ranges
+
+
+class ImagePipeline:
+    def __init__(self):
+        self.formats = _supported_formats()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._encoding = SingleFlight()
+        # LRU of manifests read from disk (the files are the source of truth)
+        self._manifests: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._manifest_lock = threading.Lock()
+        self.encoded = 0
+
+    def start(self):
+        """Create the encoder process pool"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # -------------------------
+    # Format negotiation
+    # -------------------------
+
+    def negotiate_format(self, accept: Optional[str], original_format: str) -> str:
+        """
+        Pick the output format for an Accept header.
+
+        AVIF/WebP are only served when listed explicitly, since many clients send
+        */* without being able to decode them. Ties go to the more compact format,
+        then to the original format (no re-encode needed).
+        """
+        ranges = _parse_accept(accept)
+        if not ranges:
+            return original_format
+
+        def quality(name: str) -> float:
+            media_type = MEDIA_TYPES[name]
+            if media_type in ranges:
+                return ranges[media_type]
+            if name in ("avif", "webp"):
+                return 0.0
+            return ranges.get("image/*", ranges.get("*/*", 0.0))
+
+        preference = [name for name in self.formats if name in ("avif", "webp")]
+        preference.append(original_format)
+        preference += [name for name in ("jpeg", "png") if name in self.formats and name != original_format]
+
+        best, best_q = original_format, 0.0
+        for name in preference:
+            q = quality(name)
+            if q > best_q:
+                best, best_q = name, q
+        return best
+
+    # -------------------------
+    # Variants
+    # -------------------------
+
+    def _manifest_path(self, image_hash: str) -> str:
+        return os.path.join(blob_store.root, "variants", image_hash[:2], f"{image_hash}.json")
+
+    def _cached_manifest(self, image_hash: str) -> Dict[str, str]:
+        """Manifest from the LRU or disk (caller holds the manifest lock)"""
+        manifest = self._manifests.get(image_hash)
+        if manifest is not None:
+            self._manifests.move_to_end(image_hash)
+            return manifest
+
+        try:
+            with open(self._manifest_path(image_hash), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+
+        self._manifests[image_hash] = manifest
+        while len(self._manifests) > settings.IMAGE_MANIFEST_CACHE_ENTRIES:
+            self._manifests.popitem(last=False)
+        return manifest
+
+    def _load_manifest(self, image_hash: str) -> Dict[str, str]:
+        with self._manifest_lock:
+            return self._cached_manifest(image_hash)
+
+    def _record_variant(self, image_hash: str, variant: str, variant_hash: str):
+        """Add a variant to the manifest (atomic rewrite: the manifest is a few lines)"""
+        with self._manifest_lock:
+            manifest = self._cached_manifest(image_hash)
+            manifest[variant] = variant_hash
+            path = self._manifest_path(image_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, path)
+
+    async def get_variant(
+        self,
+        image_hash: str,
+        original_format: Optional[str],
+        output_format: str,
+        size: str
+    ) -> str:
+        """
+        Hash of the blob holding image_hash in output_format at size,
+        encoding it on first request (always, if original_format is None).
+        """
+        if size == SIZE_FULL and output_format == original_format:
+            return image_hash
+
+        variant = f"{output_format}:{size}"
+        manifest = await asyncio.to_thread(self._load_manifest, image_hash)
+        variant_hash = manifest.get(variant)
+        if variant_hash and await asyncio.to_thread(blob_store.exists, variant_hash):
+            return variant_hash
+
+        return await self._encoding.do(
+            f"{image_hash}:{variant}",
+            lambda: self._encode(image_hash, variant, output_format, size)
+        )
+
+    async def _encode(self, image_hash: str, variant: str, output_format: str, size: str) -> str:
+        data = await asyncio.to_thread(blob_store.get, image_hash)
+        max_width = settings.IMAGE_THUMBNAIL_WIDTH if size == SIZE_THUMB else None
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        encoded = await loop.run_in_executor(self._executor, encode_variant, data, output_format, max_width)
+
+        variant_hash = await blob_store.put_async(encoded)
+        await asyncio.to_thread(self._record_variant, image_hash, variant, variant_hash)
+        self.encoded += 1
+        logger.info(
+            f"Encoded {variant} variant of {image_hash[:12]}: {len(data)} -> {len(encoded)} bytes"
+        )
+        return variant_hash
+
+    @staticmethod
+    def original_format(image_hash: str) -> Optional[str]:
+        """Format of the stored blob, or None if it cannot be served as is"""
+        media_type = blob_store.media_type(image_hash)
+        for name, known_type in MEDIA_TYPES.items():
+            if known_type == media_type:
+                return name
+        return None
+
+
+image_pipeline = ImagePipeline()
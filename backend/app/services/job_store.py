@@ -0,0 +1,186 @@
+"""
+SQLite-backed store for background jobs
+Job state lives on disk so queued and interrupted jobs survive a restart.
+Several processes can share one store: a job is claimed with a conditional
+update, and a running job holds a lease its owner keeps renewing, so only
+jobs whose owner stopped renewing are recovered.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+TERMINAL_STATUSES = {STATUS_SUCCEEDED, STATUS_FAILED}
+
+
+def make_dedupe_key(kind: str, params: dict) -> str:
+    encoded = json.dumps({"kind": kind, "params": params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """All methods are blocking; call them through asyncio.to_thread from async code"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                dedupe_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        # Stores created before leases existed
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        if "lease_until" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key, created_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job.pop("dedupe_key", None)
+        job.pop("owner", None)
+        job.pop("lease_until", None)
+        return job
+
+    def create(self, kind: str, params: dict, dedupe_seconds: int = 0) -> Tuple[dict, bool]:
+        """
+        Create a queued job and return (job, created). If an identical job is
+        still queued/running, or succeeded within dedupe_seconds, that job is
+        returned instead with created=False.
+        """
+        dedupe_key = make_dedupe_key(kind, params)
+        now = time.time()
+        with self._lock:
+            existing = self._conn.execute(
+                """SELECT * FROM jobs WHERE dedupe_key = ? AND (
+                    status IN (?, ?) OR (status = ? AND updated_at >= ?)
+                ) ORDER BY created_at DESC LIMIT 1""",
+                (dedupe_key, STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED, now - dedupe_seconds)
+            ).fetchone()
+            if existing is not None:
+                return self._to_dict(existing), False
+
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                """INSERT INTO jobs (id, kind, params, dedupe_key, status, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), dedupe_key, STATUS_QUEUED, now, now)
+            )
+            self._conn.commit()
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._to_dict(row), True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._to_dict(row)
+
+    def update(self, job_id: str, owner: Optional[str] = None, **fields) -> bool:
+        """
+        Set fields of a job; with owner, only while that process still holds
+        the job. Returns whether the job was updated.
+        """
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        where, args = "id = ?", [job_id]
+        if owner is not None:
+            where += " AND owner = ?"
+            args.append(owner)
+        with self._lock:
+            cursor = self._conn.execute(f"UPDATE jobs SET {columns} WHERE {where}", (*fields.values(), *args))
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def mark_running(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Claim a queued job for owner; False if it is not queued (e.g. claimed elsewhere)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, lease_until = ?, updated_at = ?
+                   WHERE id = ? AND status = ?""",
+                (STATUS_RUNNING, owner, now + lease_seconds, now, job_id, STATUS_QUEUED)
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> int:
+        """Extend the lease of every job owner is running"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+                (time.time() + lease_seconds, owner, STATUS_RUNNING)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def release(self, owner: str) -> int:
+        """Requeue the jobs owner is running (it is shutting down)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, updated_at = ? WHERE owner = ? AND status = ?",
+                (STATUS_QUEUED, time.time(), owner, STATUS_RUNNING)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def recover_interrupted(self, max_attempts: int) -> List[str]:
+        """
+        Requeue running jobs whose lease expired, i.e. whose process died
+        (failing those that already used up their attempts), and return all
+        queued job ids in submission order.
+        """
+        now = time.time()
+        expired = "status = ? AND (lease_until IS NULL OR lease_until < ?)"
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, owner = NULL, updated_at = ? WHERE {expired} AND attempts >= ?",
+                (STATUS_FAILED, "Interrupted too many times", now, STATUS_RUNNING, now, max_attempts)
+            )
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, updated_at = ? WHERE {expired}",
+                (STATUS_QUEUED, now, STATUS_RUNNING, now)
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (STATUS_QUEUED,)
+            ).fetchall()
+            return [row["id"] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,184 @@
+"""
+Background job runner
+Jobs are persisted in the JobStore, executed by a small pool of worker
+tasks and publish progress events to any SSE subscribers. Each process
+claims jobs under its own owner id and renews their leases while it runs
+them; jobs of a process that died are requeued once their lease expires.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.config import settings
+from app.services.job_store import (
+    JobStore, STATUS_FAILED, STATUS_QUEUED, STATUS_SUCCEEDED
+)
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[float, str], Awaitable[None]]
+JobHandler = Callable[[dict, ProgressCallback], Awaitable[dict]]
+
+
+class JobManager:
+    def __init__(self):
+        self.store: Optional[JobStore] = None
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._lease_task: Optional[asyncio.Task] = None
+        # Job ids in the local queue, so recovery does not enqueue them twice
+        self._queued_ids: Set[str] = set()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of the given kind"""
+        self._handlers[kind] = handler
+
+    def has_handler(self, kind: str) -> bool:
+        return kind in self._handlers
+
+    async def start(self):
+        """Open the store, requeue jobs interrupted by a restart and start workers"""
+        self.store = JobStore(settings.JOB_STORE_PATH)
+        self._queue = asyncio.Queue()
+        self._queued_ids = set()
+
+        queued = await self._recover()
+        if queued:
+            logger.info(f"Resuming {len(queued)} queued background job(s)")
+
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(settings.JOB_WORKERS)
+        ]
+        self._lease_task = asyncio.create_task(self._lease_loop())
+
+    async def stop(self):
+        """Stop workers and requeue the jobs they were running"""
+        tasks = self._workers + ([self._lease_task] if self._lease_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._lease_task = None
+
+        if self.store:
+            released = await asyncio.to_thread(self.store.release, self.owner)
+            if released:
+                logger.info(f"Requeued {released} running background job(s)")
+            self.store.close()
+            self.store = None
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._queued_ids:
+            self._queued_ids.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _recover(self) -> List[str]:
+        """Requeue jobs of dead processes and enqueue every queued job"""
+        queued = await asyncio.to_thread(self.store.recover_interrupted, settings.JOB_MAX_ATTEMPTS)
+        for job_id in queued:
+            self._enqueue(job_id)
+        return queued
+
+    async def _lease_loop(self):
+        """Renew the leases of running jobs and pick up jobs of dead processes"""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            try:
+                await asyncio.to_thread(self.store.renew_leases, self.owner, settings.JOB_LEASE_SECONDS)
+                await self._recover()
+            except Exception as e:
+                logger.error(f"Job lease renewal failed: {str(e)}")
+
+    async def submit(self, kind: str, params: dict) -> Tuple[dict, bool]:
+        """
+        Queue a job and return (job, created). Identical submissions that are
+        still pending, or finished recently, return the existing job.
+        """
+        job, created = await asyncio.to_thread(
+            self.store.create, kind, params, settings.JOB_DEDUPE_SECONDS
+        )
+        if created:
+            self._enqueue(job["id"])
+            logger.info(f"Queued {kind} job {job['id']}")
+        else:
+            logger.info(f"Reusing {job['status']} {kind} job {job['id']}")
+        return job, created
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[job_id].add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[job_id]
+
+    def _publish(self, job_id: str, event: str, data: dict):
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait((event, data))
+
+    async def _set_progress(self, job_id: str, progress: float, message: str):
+        await asyncio.to_thread(self.store.update, job_id, self.owner, progress=progress, message=message)
+        self._publish(job_id, "progress", {"progress": progress, "message": message})
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            self._queued_ids.discard(job_id)
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job["status"] != STATUS_QUEUED:
+                continue
+
+            handler = self._handlers.get(job["kind"])
+            if handler is None:
+                await asyncio.to_thread(
+                    self.store.update, job_id, status=STATUS_FAILED, error=f"Unknown job kind: {job['kind']}"
+                )
+                continue
+
+            claimed = await asyncio.to_thread(
+                self.store.mark_running, job_id, self.owner, settings.JOB_LEASE_SECONDS
+            )
+            if not claimed:
+                continue  # Another worker or process got it first
+            self._publish(job_id, "status", {"status": "running"})
+            logger.info(f"Worker {index} running {job['kind']} job {job_id}")
+
+            async def progress(fraction: float, message: str):
+                await self._set_progress(job_id, fraction, message)
+
+            try:
+                result = await handler(job["params"], progress)
+            except asyncio.CancelledError:
+                # Shutting down: stop() requeues the job
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                await asyncio.to_thread(
+                    self.store.update, job_id, self.owner, status=STATUS_FAILED, error=str(e)
+                )
+                self._publish(job_id, "error", {"detail": str(e)})
+                continue
+
+            await asyncio.to_thread(
+                self.store.update, job_id, self.owner,
+                status=STATUS_SUCCEEDED, progress=1.0, message="Completed", result=result
+            )
+            self._publish(job_id, "result", {"result": result})
+            logger.info(f"✓ Job {job_id} completed")
+
+
+job_manager = JobManager()
@@ -0,0 +1,41 @@
+"""
+Rolling latency histograms per LLM provider
+Used to pick the hedge delay from each provider's observed tail latency.
+Calls cancelled before finishing (e.g. the loser of a hedge) are recorded as
+censored samples: their elapsed time is a lower bound of the real latency,
+and leaving them out would bias the tail low.
+"""
+from collections import deque
+from typing import Optional
+from app.config import settings
+
+
+class LatencyTracker:
+    def __init__(self, window_size: int = settings.LATENCY_WINDOW_SIZE, min_samples: int = 10):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window_size)
+        self.censored = 0
+
+    def record(self, seconds: float, censored: bool = False):
+        self._samples.append(seconds)
+        if censored:
+            self.censored += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the p-th percentile (0-1) in seconds, or None until enough samples exist"""
+        if len(self._samples) < self.min_samples:
+            return None
+
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            "samples": len(self._samples),
+            "censored": self.censored,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None
+        }
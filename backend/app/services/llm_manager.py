@@ -1,46 +1,390 @@
 """
 LLM Manager - Unified interface with automatic fallback
-Tries Ollama first, falls back to Gemini if Ollama fails
+Tries Ollama first, falls back to Gemini if Ollama fails.
+Providers whose circuit breaker is open are skipped until they recover.
 """
+import asyncio
 import logging
-from typing import Optional, Tuple
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+from app.config import settings
 from app.services.ollama_client import ollama_client
 from app.services.gemini_client import gemini_client
+from app.services.response_cache import create_response_cache, make_cache_key
+from app.services.single_flight import SingleFlight
+from app.services.circuit_breaker import BreakerState, CircuitBreaker
+from app.services.latency import LatencyTracker
+from app.services.scheduler import (
+    PRIORITY_GENERATION, QueueFullError, gemini_scheduler, ollama_scheduler
+)
 
 logger = logging.getLogger(__name__)
 
 class LLMManager:
-    async def generate(self, prompt: str, system: Optional[str] = None) -> Tuple[Optional[str], str]:
+    def __init__(self):
+        self.cache = create_response_cache()
+        self.in_flight = SingleFlight()
+        self.breakers = {
+            "ollama": CircuitBreaker("ollama"),
+            "gemini": CircuitBreaker("gemini")
+        }
+        self.latency = {
+            "ollama": LatencyTracker(),
+            "gemini": LatencyTracker()
+        }
+        self.schedulers = {
+            "ollama": ollama_scheduler,
+            "gemini": gemini_scheduler
+        }
+        self._probe_task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Open provider connection pools and start health probes (called from the app lifespan)"""
+        await ollama_client.start()
+        await gemini_client.start()
+        self._probe_task = asyncio.create_task(self._probe_loop())
+    
+    async def close(self):
+        """Stop health probes and close provider connection pools on shutdown"""
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        await ollama_client.close()
+        await gemini_client.close()
+        self.cache.close()
+    
+    def _cache_key(
+        self,
+        prompt: str,
+        system: Optional[str],
+        max_tokens: Optional[int],
+        prompt_version: Optional[str],
+        ollama_messages: Optional[List[dict]] = None
+    ) -> str:
+        return make_cache_key(
+            system=system,
+            prompt=prompt,
+            ollama_messages=ollama_messages,
+            max_tokens=max_tokens,
+            prompt_version=prompt_version,
+            ollama_model=ollama_client.model,
+            gemini_model=gemini_client.model,
+            temperature=ollama_client.temperature,
+            top_p=ollama_client.top_p
+        )
+    
+    async def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        cache: bool = False,
+        hedge: bool = False,
+        priority: int = PRIORITY_GENERATION,
+        user_id: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        prompt_version: Optional[str] = None,
+        ollama_messages: Optional[List[dict]] = None
+    ) -> Tuple[Optional[str], str, bool]:
         """
         Generate text using available LLM providers
-        Returns: (generated_text, provider_used)
+        Returns: (generated_text, provider_used, fresh)
         Provider can be: "ollama", "gemini", or "none"
+        fresh is True only if this call sent the request to the provider
+        itself, i.e. the answer is not from the response cache or from an
+        identical request that was already running.
+        
+        Set cache=True for deterministic requests (e.g. grammar fixes) to
+        reuse an earlier answer for the exact same prompt and options.
+        Identical requests that arrive while one is already running share
+        its result instead of starting another generation.
+        
+        Set hedge=True for latency-critical calls: if the primary provider has
+        not answered within its observed p95 latency, the fallback is started
+        as well and whichever answers first wins.
+        
+        Provider calls are admitted through per-provider schedulers in
+        priority order, fairly across user_id. If every usable provider queue
+        is full, QueueFullError (HTTP 429 with Retry-After) is raised.
+        
+        max_tokens caps the answer length (Ollama num_predict, Gemini
+        maxOutputTokens); see app.services.prompt_budget. prompt_version is the
+        registry version of the template the prompt was rendered from and
+        scopes cached answers to it.
+        
+        ollama_messages continues an Ollama chat session (see
+        app.services.chat_sessions) instead of sending system + prompt to
+        Ollama; other providers always get the standalone prompt.
         """
+        key = self._cache_key(prompt, system, max_tokens, prompt_version, ollama_messages)
         
-        # Try Ollama first
-        logger.info("Attempting generation with Ollama...")
-        result = await ollama_client.generate(prompt, system)
+        if cache:
+            cached = await self.cache.get(key)
+            if cached:
+                logger.info(f"✓ Response cache hit ({cached[1]})")
+                return cached[0], cached[1], False
         
-        if result:
-            logger.info("✓ Ollama generation successful")
-            return result, "ollama"
+        # Only the caller whose run() starts the shared task sent the request
+        started = False
         
-        # Fallback to Gemini
-        logger.info("Ollama failed, falling back to Gemini...")
+        async def run() -> Tuple[Optional[str], str]:
+            nonlocal started
+            started = True
+            if hedge:
+                result, provider = await self._generate_hedged(
+                    prompt, system, priority, user_id, max_tokens, ollama_messages
+                )
+            else:
+                result, provider = await self._generate(
+                    prompt, system, priority, user_id, max_tokens, ollama_messages
+                )
+            if cache and result:
+                await self.cache.set(key, (result, provider))
+            return result, provider
         
-        if not gemini_client.is_configured():
-            logger.error("Gemini not configured, no fallback available")
-            return None, "none"
+        result, provider = await self.in_flight.do(key, run)
+        return result, provider, started
+    
+    def _providers(self) -> List[Tuple[str, object]]:
+        """Providers in routing order (Ollama first, Gemini as fallback)"""
+        providers = [("ollama", ollama_client)]
+        if gemini_client.is_configured():
+            providers.append(("gemini", gemini_client))
+        return providers
+    
+    async def _call_provider(
+        self,
+        name: str,
+        client,
+        prompt: str,
+        system: Optional[str],
+        priority: int,
+        user_id: Optional[str],
+        max_tokens: Optional[int] = None,
+        ollama_messages: Optional[List[dict]] = None
+    ) -> Optional[str]:
+        """
+        Call one provider through its scheduler and circuit breaker,
+        recording the outcome and latency. Raises QueueFullError if the
+        provider queue is at capacity.
+        """
+        breaker = self.breakers[name]
+        if breaker.is_blocking():
+            logger.info(f"Skipping {name}: circuit {breaker.state.value}")
+            return None
         
-        result = await gemini_client.generate(prompt, system)
+        async with self.schedulers[name].slot(priority, user_id):
+            # Check again after queueing: the circuit may have opened meanwhile
+            if not breaker.allow_request():
+                logger.info(f"Skipping {name}: circuit {breaker.state.value}")
+                return None
+            
+            logger.info(f"Attempting generation with {name}...")
+            started = time.monotonic()
+            try:
+                if name == "ollama" and ollama_messages:
+                    result = await client.generate(prompt, system, max_tokens, messages=ollama_messages)
+                else:
+                    result = await client.generate(prompt, system, max_tokens)
+            except asyncio.CancelledError:
+                breaker.release()
+                # Cancelled (e.g. lost a hedge): it took at least this long
+                self.latency[name].record(time.monotonic() - started, censored=True)
+                raise
         
+        # Failed calls count too, so slow failures show up in the tail
+        self.latency[name].record(time.monotonic() - started)
         if result:
-            logger.info("✓ Gemini generation successful")
-            return result, "gemini"
+            breaker.record_success()
+            logger.info(f"✓ {name} generation successful")
+            return result
+        
+        breaker.record_failure()
+        logger.info(f"{name} failed")
+        return None
+    
+    async def _generate(
+        self,
+        prompt: str,
+        system: Optional[str],
+        priority: int,
+        user_id: Optional[str],
+        max_tokens: Optional[int] = None,
+        ollama_messages: Optional[List[dict]] = None
+    ) -> Tuple[Optional[str], str]:
+        overloaded: Optional[QueueFullError] = None
+        for name, client in self._providers():
+            try:
+                result = await self._call_provider(
+                    name, client, prompt, system, priority, user_id, max_tokens, ollama_messages
+                )
+            except QueueFullError as e:
+                logger.warning(f"{name} queue full, trying next provider...")
+                overloaded = e
+                continue
+            if result:
+                return result, name
+        
+        if overloaded:
+            raise overloaded
+        
+        logger.error("All LLM providers failed")
+        return None, "none"
+    
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait on a provider before hedging, from its latency histogram"""
+        observed = self.latency[name].percentile(settings.HEDGE_PERCENTILE)
+        if observed is None:
+            return settings.HEDGE_DEFAULT_DELAY
+        return min(settings.HEDGE_MAX_DELAY, max(settings.HEDGE_MIN_DELAY, observed))
+    
+    async def _generate_hedged(
+        self,
+        prompt: str,
+        system: Optional[str],
+        priority: int,
+        user_id: Optional[str],
+        max_tokens: Optional[int] = None,
+        ollama_messages: Optional[List[dict]] = None
+    ) -> Tuple[Optional[str], str]:
+        providers = self._providers()
+        if len(providers) < 2:
+            return await self._generate(prompt, system, priority, user_id, max_tokens, ollama_messages)
+        
+        (primary_name, primary), (backup_name, backup) = providers[:2]
+        tasks = {
+            asyncio.create_task(
+                self._call_provider(
+                    primary_name, primary, prompt, system, priority, user_id, max_tokens, ollama_messages
+                )
+            ): primary_name
+        }
+        overloaded: Optional[QueueFullError] = None
+        
+        try:
+            delay = self.hedge_delay(primary_name)
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            
+            if done:
+                try:
+                    result = done.pop().result()
+                except QueueFullError as e:
+                    overloaded = e
+                    result = None
+                if result:
+                    return result, primary_name
+            else:
+                logger.info(f"{primary_name} slower than {delay:.1f}s, hedging with {backup_name}")
+            tasks[asyncio.create_task(
+                self._call_provider(
+                    backup_name, backup, prompt, system, priority, user_id, max_tokens, ollama_messages
+                )
+            )] = backup_name
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        result = task.result()
+                    except QueueFullError as e:
+                        overloaded = e
+                        continue
+                    if result:
+                        return result, tasks[task]
+        finally:
+            # Cancel the loser (or everything, if the caller went away)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        if overloaded:
+            raise overloaded
         
         logger.error("All LLM providers failed")
         return None, "none"
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        priority: int = PRIORITY_GENERATION,
+        user_id: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream generated text as (token, provider) pairs.
+        Falls back to Gemini if Ollama fails before producing any output.
+        Once tokens have been sent, a mid-stream failure is re-raised since
+        the partial answer cannot be taken back.
+        The provider's scheduler slot is held until the stream ends.
+        """
+        overloaded: Optional[QueueFullError] = None
+        for name, client in self._providers():
+            breaker = self.breakers[name]
+            if breaker.is_blocking():
+                logger.info(f"Skipping {name}: circuit {breaker.state.value}")
+                continue
+            
+            streamed = False
+            try:
+                async with self.schedulers[name].slot(priority, user_id):
+                    if not breaker.allow_request():
+                        logger.info(f"Skipping {name}: circuit {breaker.state.value}")
+                        continue
+                    
+                    logger.info(f"Attempting streaming generation with {name}...")
+                    async for token in client.generate_stream(prompt, system, max_tokens):
+                        if not streamed:
+                            # The first token is enough to know the provider is healthy
+                            streamed = True
+                            breaker.record_success()
+                        yield token, name
+            except QueueFullError as e:
+                logger.warning(f"{name} queue full, trying next provider...")
+                overloaded = e
+                continue
+            except (asyncio.CancelledError, GeneratorExit):
+                if not streamed:
+                    breaker.release()
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                if streamed:
+                    logger.error(f"{name} stream failed mid-response: {str(e)}")
+                    raise
+                logger.warning(f"{name} stream failed: {str(e)}")
+                continue
+            
+            if streamed:
+                logger.info(f"✓ {name} streaming generation successful")
+                return
+            
+            breaker.record_failure()
+        
+        if overloaded:
+            raise overloaded
+        
+        logger.error("All LLM providers failed")
+    
+    async def _probe_loop(self):
+        """Periodically probe providers whose circuit is open"""
+        while True:
+            await asyncio.sleep(settings.CIRCUIT_PROBE_INTERVAL)
+            for name, client in self._providers():
+                breaker = self.breakers[name]
+                if breaker.state != BreakerState.OPEN:
+                    continue
+                try:
+                    if await client.is_available():
+                        logger.info(f"Health probe reached {name}, allowing a trial request")
+                        breaker.probe_succeeded()
+                except Exception as e:
+                    logger.warning(f"Health probe for {name} failed: {str(e)}")
+    
     async def check_availability(self) -> dict:
         """Check which providers are available"""
         ollama_available = await ollama_client.is_available()
@@ -49,7 +393,10 @@ class LLMManager:
         return {
             "ollama": ollama_available,
             "gemini": gemini_available,
-            "any_available": ollama_available or gemini_available
+            "any_available": ollama_available or gemini_available,
+            "circuits": {name: breaker.snapshot() for name, breaker in self.breakers.items()},
+            "latency": {name: tracker.snapshot() for name, tracker in self.latency.items()},
+            "queues": {name: scheduler.stats() for name, scheduler in self.schedulers.items()}
         }
 
 llm_manager = LLMManager()
\ No newline at end of file
@@ -1,53 +1,109 @@
 """
 Ollama client for local LLM inference
+Uses /api/chat with keep_alive so the model stays loaded and a request whose
+messages start with the previous conversation reuses its evaluated KV cache
 """
 import aiohttp
 import asyncio
+import json
 import logging
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
 from app.config import settings
+from app.services.http_pool import create_session
 
 logger = logging.getLogger(__name__)
 
+def chat_messages(prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+    """Chat messages for a standalone request (system prompt first, so it is a shared prefix)"""
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
 class OllamaClient:
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
         self.timeout = settings.OLLAMA_TIMEOUT
+        self.temperature = 0.7
+        self.top_p = 0.9
+        self.keep_alive = settings.OLLAMA_KEEP_ALIVE
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.prompt_eval_tokens = 0
+    
+    async def start(self):
+        """Open the pooled HTTP session (called from the app lifespan)"""
+        if self._session is None or self._session.closed:
+            self._session = create_session(settings.OLLAMA_MAX_CONNECTIONS)
+            logger.info("Ollama connection pool opened")
+    
+    async def close(self):
+        """Close the pooled HTTP session and release its connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("Ollama connection pool closed")
+        self._session = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Lazily open the pool when used outside the app lifespan (scripts, tests)
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+    
+    def _build_payload(self, messages: List[Dict[str, str]], stream: bool, max_tokens: Optional[int] = None) -> dict:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": self.temperature,
+                "top_p": self.top_p,
+                # Pin the context window the prompt budget is computed against
+                "num_ctx": settings.OLLAMA_CONTEXT_TOKENS,
+            }
+        }
+        
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+        
+        return payload
+    
+    def _record_eval(self, data: dict):
+        # prompt_eval_count only counts tokens that were not reused from the KV cache
+        evaluated = data.get("prompt_eval_count", 0)
+        self.prompt_eval_tokens += evaluated
+        logger.info(f"Ollama evaluated {evaluated} prompt tokens")
     
-    async def generate(self, prompt: str, system: Optional[str] = None) -> Optional[str]:
+    async def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        messages: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[str]:
         """
         Generate text using Ollama
+        Sends messages (a conversation ending in a user turn) instead of
+        system + prompt when given.
         Returns None if generation fails
         """
         try:
-            url = f"{self.base_url}/api/generate"
-            
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                }
-            }
-            
-            if system:
-                payload["system"] = system
+            url = f"{self.base_url}/api/chat"
+            payload = self._build_payload(messages or chat_messages(prompt, system), stream=False, max_tokens=max_tokens)
             
             timeout = aiohttp.ClientTimeout(total=self.timeout)
+            session = await self._get_session()
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        result = data.get("response", "").strip()
-                        logger.info(f"Ollama generation successful. Length: {len(result)}")
-                        return result if result else None
-                    else:
-                        logger.warning(f"Ollama returned status {response.status}")
-                        return None
+            async with session.post(url, json=payload, timeout=timeout) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    self._record_eval(data)
+                    result = data.get("message", {}).get("content", "").strip()
+                    logger.info(f"Ollama generation successful. Length: {len(result)}")
+                    return result if result else None
+                else:
+                    logger.warning(f"Ollama returned status {response.status}")
+                    return None
                         
         except asyncio.TimeoutError:
             logger.warning(f"Ollama timeout after {self.timeout}s")
@@ -59,15 +115,54 @@ class OllamaClient:
             logger.error(f"Unexpected Ollama error: {str(e)}")
             return None
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated tokens from Ollama as they are produced.
+        Raises on connection errors, timeouts or a non-200 status so the
+        caller can decide whether to fall back to another provider.
+        """
+        url = f"{self.base_url}/api/chat"
+        payload = self._build_payload(chat_messages(prompt, system), stream=True, max_tokens=max_tokens)
+        
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        session = await self._get_session()
+        
+        async with session.post(url, json=payload, timeout=timeout) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Ollama returned status {response.status}")
+            
+            # Ollama streams newline-delimited JSON objects
+            async for line in response.content:
+                line = line.strip()
+                if not line:
+                    continue
+                
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                
+                token = chunk.get("message", {}).get("content", "")
+                if token:
+                    yield token
+                
+                if chunk.get("done"):
+                    self._record_eval(chunk)
+                    break
+    
     async def is_available(self) -> bool:
         """Check if Ollama is running and accessible"""
         try:
             url = f"{self.base_url}/api/tags"
             timeout = aiohttp.ClientTimeout(total=5)
+            session = await self._get_session()
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as response:
-                    return response.status == 200
+            async with session.get(url, timeout=timeout) as response:
+                return response.status == 200
         except:
             return False
 
@@ -0,0 +1,224 @@
+"""
+Prompt token budgeting
+Estimates prompt size per provider tokenizer, trims optional prompt parts so
+requests fit the input budget, and derives output token limits
+(num_predict / maxOutputTokens) from the expected size of the answer.
+Rewrites of a text are limited from the text's own size, capped at what the
+context window leaves after the prompt, and rejected with a 413 if not even
+the text's own size is left, instead of being cut off mid-answer.
+
+Trim priority: optional parts are cut in TRIM_ORDER, first entry first, and a
+part is only touched once everything before it has been cut entirely. The
+system prompt, the template text, the topic and post content being edited are
+never trimmed.
+"""
+import logging
+import math
+import re
+from typing import Dict, NamedTuple, Optional
+from fastapi import HTTPException
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional prompt parts, least important first
+TRIM_ORDER = ("reference_post", "custom_instructions")
+
+# Typical generated post (~300 words) used as the expected output size
+EXPECTED_POST_CHARS = 2000
+
+# Answers run somewhat longer than expected; never cut one off mid-sentence
+OUTPUT_HEADROOM = 1.25
+MIN_OUTPUT_TOKENS = 128
+
+TRIM_MARKER = " [...]"
+
+
+class PromptTooLargeError(HTTPException):
+    """The untrimmable part of a prompt does not fit next to the answer; surfaces as 413"""
+
+    def __init__(self, prompt_tokens: int, budget: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Content is too long to process (about {prompt_tokens} tokens, at most {budget} fit)."
+        )
+
+
+class TokenizerProfile(NamedTuple):
+    chars_per_token: float        # Latin-script words (accented letters count double)
+    script_chars_per_token: float # Words in other alphabets (Cyrillic, Devanagari, Arabic, ...)
+    cjk_tokens: float             # Per Chinese / Japanese / Korean character or punctuation mark
+    symbol_tokens: float          # Per emoji or other non-ASCII symbol
+
+
+# Approximations of each provider's tokenizer per script: SentencePiece
+# models served by Ollama split non-Latin words, CJK and emojis (byte
+# fallback) more finely than Gemini's larger vocabulary.
+TOKENIZER_PROFILES = {
+    "ollama": TokenizerProfile(chars_per_token=3.2, script_chars_per_token=1.5, cjk_tokens=1.5, symbol_tokens=3.0),
+    "gemini": TokenizerProfile(chars_per_token=4.0, script_chars_per_token=3.0, cjk_tokens=1.0, symbol_tokens=1.5),
+}
+
+# Prompts are built before routing, so budgets use the strictest tokenizer
+BUDGET_PROVIDER = "ollama"
+
+_CJK = r"\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef"
+_LATIN = r"A-Za-z\u00c0-\u024f"
+# Letters of other alphabets, plus the combining marks (e.g. Devanagari
+# vowel signs) that are not word characters themselves
+_SCRIPT = r"(?:[^\W\d_]|[\u0300-\u036f\u0900-\u0dff\u0e00-\u0e7f])"
+
+_PIECE_PATTERN = re.compile(rf"[{_CJK}]|[{_LATIN}]+|{_SCRIPT}+|\d+|\n|\S")
+_CJK_PATTERN = re.compile(rf"[{_CJK}]")
+_LATIN_PATTERN = re.compile(rf"[{_LATIN}]+")
+
+
+def _piece_tokens(piece: str, profile: TokenizerProfile) -> float:
+    if piece == "\n":
+        return 0.5
+    if piece.isascii():
+        if piece[0].isalnum():
+            return max(1.0, len(piece) / profile.chars_per_token)
+        return 1.0  # Punctuation
+    if _CJK_PATTERN.match(piece):
+        return profile.cjk_tokens
+    if _LATIN_PATTERN.match(piece):
+        accented = sum(1 for char in piece if not char.isascii())
+        return max(1.0, (len(piece) + accented) / profile.chars_per_token)
+    if len(piece) == 1 and not piece.isalpha():
+        return profile.symbol_tokens
+    return max(1.0, len(piece) / profile.script_chars_per_token)
+
+
+def estimate_tokens(text: str, provider: str = BUDGET_PROVIDER) -> int:
+    """Estimate the token count of text for a provider's tokenizer"""
+    if not text:
+        return 0
+
+    profile = TOKENIZER_PROFILES[provider]
+    return math.ceil(sum(_piece_tokens(piece, profile) for piece in _PIECE_PATTERN.findall(text)))
+
+
+def output_token_limit(expected_chars: int = EXPECTED_POST_CHARS) -> int:
+    """
+    Output token cap for an answer of about expected_chars. Uses the
+    tokenizer that needs the most tokens so the limit is safe for every provider.
+    """
+    profile = TOKENIZER_PROFILES[BUDGET_PROVIDER]
+    tokens = math.ceil(expected_chars / profile.chars_per_token * OUTPUT_HEADROOM)
+    return max(MIN_OUTPUT_TOKENS, tokens)
+
+
+def rewrite_token_limit(text: str, growth: float, slack_chars: int = 0) -> int:
+    """
+    Output token cap for an answer that rewrites text: text's own estimated
+    tokens scaled by growth (never less than the text itself), plus
+    slack_chars for additions such as emojis and hashtags.
+    """
+    profile = TOKENIZER_PROFILES[BUDGET_PROVIDER]
+    tokens = estimate_tokens(text) * max(1.0, growth) + slack_chars / profile.chars_per_token
+    return max(MIN_OUTPUT_TOKENS, math.ceil(tokens * OUTPUT_HEADROOM))
+
+
+# Output limit for generating a whole post
+POST_MAX_TOKENS = output_token_limit(EXPECTED_POST_CHARS)
+
+
+def prompt_token_budget(max_output_tokens: int) -> int:
+    """Input tokens available once the answer's share of the context is reserved"""
+    return max(0, settings.OLLAMA_CONTEXT_TOKENS - max_output_tokens)
+
+
+def fit_output_limit(fixed_text: str, max_output_tokens: int, min_output_tokens: int) -> int:
+    """
+    Cap max_output_tokens at what the context leaves after fixed_text (the
+    part of the prompt that is never trimmed). Raises PromptTooLargeError
+    if less than min_output_tokens is left.
+    """
+    prompt_tokens = estimate_tokens(fixed_text)
+    available = settings.OLLAMA_CONTEXT_TOKENS - prompt_tokens
+    if available < min_output_tokens:
+        raise PromptTooLargeError(prompt_tokens, settings.OLLAMA_CONTEXT_TOKENS - min_output_tokens)
+    return min(max_output_tokens, available)
+
+
+def trim_to_tokens(text: str, max_tokens: int, provider: str = BUDGET_PROVIDER) -> str:
+    """Cut text to max_tokens, keeping the beginning and ending on a whole word"""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text, provider) <= max_tokens:
+        return text
+
+    # Keep whole pieces until the budget (minus the marker) is used up
+    profile = TOKENIZER_PROFILES[provider]
+    limit = max_tokens - estimate_tokens(TRIM_MARKER, provider)
+    used = 0.0
+    low = 0
+    for match in _PIECE_PATTERN.finditer(text):
+        used += _piece_tokens(match.group(), profile)
+        if used > limit:
+            break
+        low = match.end()
+
+    cut = text[:low].rstrip()
+    return cut + TRIM_MARKER if cut else ""
+
+
+def fit_prompt_parts(
+    fixed_text: str,
+    parts: Dict[str, Optional[str]],
+    max_output_tokens: int
+) -> Dict[str, Optional[str]]:
+    """
+    Trim optional prompt parts so fixed_text plus the parts fit the budget.
+
+    Args:
+        fixed_text: Everything that is never trimmed (system prompt, template, topic, content)
+        parts: Optional parts by name (keys from TRIM_ORDER); None values are ignored
+        max_output_tokens: Output limit of the request (reserved from the context)
+
+    Returns:
+        The parts, trimmed in TRIM_ORDER as needed
+    """
+    budget = min(settings.PROMPT_MAX_TOKENS, prompt_token_budget(max_output_tokens))
+    sizes = {name: estimate_tokens(text) for name, text in parts.items() if text}
+    overflow = estimate_tokens(fixed_text) + sum(sizes.values()) - budget
+    if overflow <= 0:
+        return dict(parts)
+
+    fitted = dict(parts)
+    for name in TRIM_ORDER:
+        if overflow <= 0:
+            break
+        size = sizes.get(name, 0)
+        if not size:
+            continue
+
+        keep = max(0, size - overflow)
+        fitted[name] = trim_to_tokens(parts[name], keep) or None
+        overflow -= size - keep
+        logger.info(f"Trimmed {name} from ~{size} to ~{keep} tokens to fit prompt budget ({budget})")
+
+    if overflow > 0:
+        logger.warning(f"Prompt exceeds budget by ~{overflow} tokens after trimming optional parts")
+    return fitted
+
+
+def add_custom_instructions(
+    system: str,
+    prompt: str,
+    custom_instructions: Optional[str],
+    max_output_tokens: int,
+    label: str = "Additional instructions"
+) -> str:
+    """Append custom instructions to prompt, trimmed to what the budget leaves"""
+    if not custom_instructions:
+        return prompt
+
+    prefix = f"\n\n{label}: "
+    fitted = fit_prompt_parts(
+        f"{system}\n\n{prompt}{prefix}",
+        {"custom_instructions": custom_instructions},
+        max_output_tokens
+    )["custom_instructions"]
+    return f"{prompt}{prefix}{fitted}" if fitted else prompt
@@ -0,0 +1,140 @@
+"""
+Prompt template registry
+Every prompt template is registered once (at import, i.e. app startup) with
+its declared variables. Registration validates the template against them and
+compiles it into a renderer, so requests never re-parse format strings.
+
+Each template carries a version hash of its content (system prompt, text and
+variables) that the response cache and usage stats key on, and a static
+prefix: the text before the first variable, which stays byte-identical across
+requests and can be reused from the model's prompt cache.
+"""
+import hashlib
+import logging
+import string
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PromptTemplateError(ValueError):
+    """A template does not match its declared variables"""
+
+
+class PromptTemplate:
+    __slots__ = ("name", "system", "text", "variables", "version", "prefix", "_parts", "_slots")
+
+    def __init__(self, name: str, text: str, variables: Iterable[str], system: Optional[str] = None):
+        self.name = name
+        self.system = system
+        self.text = text
+        self.variables: Tuple[str, ...] = tuple(variables)
+
+        literals, fields = self._parse(name, text, self.variables)
+        self.prefix = literals[0]
+        # Literal chunks interleaved with a slot per variable occurrence;
+        # rendering fills the slots and joins, without re-parsing the text
+        self._parts = [literals[0]]
+        slots = []
+        for field, literal in zip(fields, literals[1:]):
+            slots.append((len(self._parts), field))
+            self._parts += [None, literal]
+        self._slots = tuple(slots)
+
+        digest = hashlib.sha256()
+        for part in (system or "", text, ",".join(self.variables)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        self.version = digest.hexdigest()[:12]
+
+    @staticmethod
+    def _parse(name: str, text: str, variables: Tuple[str, ...]):
+        """Split text into literal chunks and field names, validating every field"""
+        literals = [""]
+        fields = []
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise PromptTemplateError(f"Prompt '{name}': {e}") from e
+
+        for literal, field, spec, conversion in parsed:
+            literals[-1] += literal
+            if field is None:
+                continue
+            if spec or conversion:
+                raise PromptTemplateError(f"Prompt '{name}': format specs are not supported ({{{field}}})")
+            if field not in variables:
+                raise PromptTemplateError(f"Prompt '{name}': undeclared variable {{{field}}}")
+            fields.append(field)
+            literals.append("")
+
+        unused = set(variables) - set(fields)
+        if unused:
+            raise PromptTemplateError(f"Prompt '{name}': declared variables not used: {sorted(unused)}")
+        return literals, fields
+
+    def render(self, **values: str) -> str:
+        """Fill in the template; values must match the declared variables exactly"""
+        parts = self._parts[:]
+        try:
+            for index, field in self._slots:
+                parts[index] = values[field]
+        except KeyError as e:
+            raise PromptTemplateError(f"Prompt '{self.name}': missing variable {e}") from None
+
+        if len(values) != len(self.variables):
+            extra = set(values) - set(self.variables)
+            raise PromptTemplateError(f"Prompt '{self.name}': unexpected variables {sorted(extra)}")
+        return "".join(parts)
+
+
+class PromptRegistry:
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._renders: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        text: str,
+        variables: Iterable[str],
+        system: Optional[str] = None
+    ) -> PromptTemplate:
+        """
+        Validate and compile a template. Raises PromptTemplateError if it does
+        not match its variables or the name is already taken by another template.
+        """
+        template = PromptTemplate(name, text, variables, system)
+        with self._lock:
+            existing = self._templates.get(name)
+            if existing is not None and existing.version != template.version:
+                raise PromptTemplateError(f"Prompt '{name}' is already registered with different content")
+            self._templates[name] = template
+        logger.debug(f"Registered prompt {name}@{template.version}")
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def render(self, name: str, **values: str) -> Tuple[str, PromptTemplate]:
+        """Render a registered template, counting renders per version"""
+        template = self._templates[name]
+        prompt = template.render(**values)
+        self._renders[(name, template.version)] += 1
+        return prompt, template
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def stats(self) -> dict:
+        return {
+            "templates": len(self._templates),
+            "versions": {name: template.version for name, template in sorted(self._templates.items())},
+            "renders": {f"{name}@{version}": count for (name, version), count in self._renders.most_common()},
+        }
+
+
+prompt_registry = PromptRegistry()
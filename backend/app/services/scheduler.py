@@ -0,0 +1,140 @@
+"""
+Admission control in front of the LLM providers
+Caps concurrent generations per provider and queues the rest by priority,
+with fair ordering between users inside a priority level
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import HTTPException
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0  # Edits and rewrites of an existing post
+PRIORITY_GENERATION = 1   # Full post generation
+PRIORITY_BATCH = 2        # Bulk / background work
+
+
+class QueueFullError(HTTPException):
+    """Raised when a provider queue is at capacity; surfaces as 429 with Retry-After"""
+
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail=f"AI provider {provider} is busy. Please retry in {retry_after}s.",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class AdmissionScheduler:
+    def __init__(self, name: str, max_in_flight: int, max_queue_depth: int):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue_depth = max_queue_depth
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._queue: List[list] = []
+        self._seq = itertools.count()
+        # Start-time fair queuing: each user's next request is tagged after
+        # their previous one, so a user with many queued requests cannot
+        # starve others at the same priority
+        self._virtual_time = 0.0
+        self._user_tags: dict = {}
+        self._avg_service_seconds = 5.0
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_GENERATION, user_id: Optional[str] = None):
+        """Hold one in-flight slot for the duration of the block"""
+        await self.acquire(priority, user_id)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * elapsed
+            self.release()
+
+    async def acquire(self, priority: int, user_id: Optional[str]):
+        if self.in_flight < self.max_in_flight and self.waiting == 0:
+            self.in_flight += 1
+            return
+
+        if self.waiting >= self.max_queue_depth:
+            self.rejected += 1
+            raise QueueFullError(self.name, self.retry_after())
+
+        user = user_id or "anonymous"
+        tag = max(self._virtual_time, self._user_tags.get(user, 0.0)) + 1
+        self._user_tags[user] = tag
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [priority, tag, next(self._seq), future])
+        self.waiting += 1
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self.release()
+            else:
+                self.waiting -= 1
+            raise
+
+    def release(self):
+        while self._queue:
+            _, tag, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue  # Waiter was cancelled while queued
+
+            # Hand the slot straight to the next waiter
+            self.waiting -= 1
+            self._virtual_time = tag
+            future.set_result(None)
+            self._prune_user_tags()
+            return
+
+        self.in_flight -= 1
+
+    def _prune_user_tags(self):
+        if len(self._user_tags) > 1000:
+            self._user_tags = {
+                user: tag for user, tag in self._user_tags.items() if tag > self._virtual_time
+            }
+
+    def retry_after(self) -> int:
+        """Rough seconds until the queue drains enough to admit a new request"""
+        estimate = (self.waiting + 1) / self.max_in_flight * self._avg_service_seconds
+        return max(1, min(120, math.ceil(estimate)))
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.waiting,
+            "max_in_flight": self.max_in_flight,
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected
+        }
+
+
+ollama_scheduler = AdmissionScheduler(
+    "ollama",
+    max_in_flight=settings.OLLAMA_MAX_IN_FLIGHT,
+    max_queue_depth=settings.SCHEDULER_MAX_QUEUE_DEPTH
+)
+
+gemini_scheduler = AdmissionScheduler(
+    "gemini",
+    max_in_flight=settings.GEMINI_MAX_IN_FLIGHT,
+    max_queue_depth=settings.SCHEDULER_MAX_QUEUE_DEPTH
+)
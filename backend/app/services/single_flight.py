@@ -0,0 +1,67 @@
+"""
+Single-flight request coalescing
+Concurrent calls with the same key share one in-flight task instead of
+each doing the same expensive work
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        # Set when the task is cancelled: it may take a moment to finish, and
+        # nobody must join it meanwhile
+        self.cancelled = False
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() once per key at a time and hand its result to every caller.
+
+        Each caller awaits the shared task through asyncio.shield, so one
+        cancelled caller (e.g. a disconnected client) does not cancel the work
+        for the others. The task is only cancelled once every caller is gone;
+        a caller arriving after that starts a fresh task.
+        """
+        call = self._calls.get(key)
+        if call is None or call.task.done() or call.cancelled:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info("Joining in-flight request for identical prompt")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                logger.info("All waiters left, cancelling in-flight request")
+                call.cancelled = True
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
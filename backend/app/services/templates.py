@@ -1,6 +1,8 @@
 """
 LinkedIn Post Templates
 """
+from typing import Tuple
+from app.services.prompt_registry import PromptTemplate, prompt_registry
 
 TEMPLATES = {
     "story": {
@@ -259,4 +261,15 @@ def get_template(template_key: str) -> dict:
 
 def get_all_template_names() -> dict:
     """Get all template names and keys"""
-    return {key: value["name"] for key, value in TEMPLATES.items()}
\ No newline at end of file
+    return {key: value["name"] for key, value in TEMPLATES.items()}
+
+# Compiled at startup; rendered through the prompt registry
+PROMPT_TEMPLATES = {
+    key: prompt_registry.register(f"template.{key}", value["template"], ("topic",), system=value["system"])
+    for key, value in TEMPLATES.items()
+}
+
+def render_template(template_key: str, topic: str) -> Tuple[str, PromptTemplate]:
+    """Render a template for a topic, falling back to the default like get_template"""
+    template = PROMPT_TEMPLATES.get(template_key, PROMPT_TEMPLATES["story"])
+    return prompt_registry.render(template.name, topic=topic)
\ No newline at end of file
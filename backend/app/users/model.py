@@ -4,7 +4,7 @@ Enhanced User model with session tracking and refresh tokens
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 
 from bson import ObjectId
 from pydantic import BaseModel, EmailStr, Field
@@ -32,8 +32,15 @@ class PyObjectId(ObjectId):
 
 
 class RefreshToken(BaseModel):
+    """Document in the refresh_tokens collection (removed by a TTL index at expires_at)"""
     token_id: str
+    user_id: PyObjectId
     expires_at: datetime
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = {
+        "arbitrary_types_allowed": True,
+    }
 
 
 class UserInDB(BaseModel):
@@ -46,7 +53,6 @@ class UserInDB(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_login: Optional[datetime] = None
     last_active_at: Optional[datetime] = None
-    refresh_tokens: List[RefreshToken] = Field(default_factory=list)
     is_active: bool = True
 
     model_config = {
@@ -56,6 +62,24 @@ class UserInDB(BaseModel):
     }
 
 
+class CurrentUser(BaseModel):
+    """User resolved from an access token (projection without credentials)"""
+    id: PyObjectId = Field(alias="_id")
+    name: str
+    email: EmailStr
+    plan: str = "free"
+    avatar_url: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_login: Optional[datetime] = None
+    last_active_at: Optional[datetime] = None
+    is_active: bool = True
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+    }
+
+
 class UserOut(BaseModel):
     id: str
     name: str
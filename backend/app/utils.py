@@ -1,94 +1,149 @@
-import json
+import asyncio
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import logging
-from threading import Lock
+from .post_store import PostStore, PostWriter
 
 logger = logging.getLogger(__name__)
 
 # File paths
-POSTS_LOG_FILE = os.path.join(os.path.dirname(__file__), "..", "posts_log.json")
+POSTS_LOG_FILE = os.path.join(os.path.dirname(__file__), "..", "posts_log.json")  # Legacy, migrated on first use
+POSTS_STORE_FILE = os.path.join(os.path.dirname(__file__), "..", "posts_log.jsonl")
 
-# Thread-safe file access
-file_lock = Lock()
+_post_store = PostStore(POSTS_STORE_FILE)
+_migrated = False
 
-def read_posts_log() -> List[Dict]:
+# All appends go through one writer task (group commit)
+post_writer = PostWriter(_post_store)
+
+
+def get_post_store() -> PostStore:
+    """
+    Return the post store, importing the legacy posts_log.json on first use
+    """
+    global _migrated
+    if not _migrated:
+        _post_store.migrate_from_json(POSTS_LOG_FILE)
+        _migrated = True
+    return _post_store
+
+
+async def start_post_log() -> None:
+    """
+    Prepare the post log (legacy migration, index build) off the event loop
+    and start the writer task
+    """
+    await asyncio.to_thread(get_post_store)
+    post_writer.start()
+
+
+async def stop_post_log() -> None:
+    """
+    Flush queued posts and stop the writer task
+    """
+    await post_writer.stop()
+
+
+async def append_post(post: Dict) -> Dict:
+    """
+    Append a post through the writer task
+    
+    Returns:
+        The stored post (with its id)
+    """
+    return await post_writer.append(post)
+
+
+async def read_posts_log() -> List[Dict]:
     """
     Read all posts from the log file
     
     Returns:
         List of post dictionaries
     """
-    with file_lock:
-        try:
-            if not os.path.exists(POSTS_LOG_FILE):
-                logger.info("Posts log file doesn't exist, creating new one")
-                return []
-            
-            with open(POSTS_LOG_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('posts', [])
-                
-        except json.JSONDecodeError:
-            logger.warning("Invalid JSON in posts log, returning empty list")
-            return []
-        except Exception as e:
-            logger.error(f"Error reading posts log: {str(e)}")
-            return []
-
-
-def write_posts_log(posts: List[Dict]) -> None:
-    """
-    Write posts to the log file (thread-safe)
+    try:
+        return await asyncio.to_thread(lambda: get_post_store().read_all())
+    except Exception as e:
+        logger.error(f"Error reading posts log: {str(e)}")
+        return []
+
+
+async def write_posts_log(posts: List[Dict]) -> None:
+    """
+    Replace the whole log with the given posts (atomic)
     
     Args:
         posts: List of post dictionaries to save
     """
-    with file_lock:
-        try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(POSTS_LOG_FILE), exist_ok=True)
-            
-            # Write to file with pretty printing
-            with open(POSTS_LOG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(
-                    {'posts': posts},
-                    f,
-                    indent=2,
-                    ensure_ascii=False
-                )
-            
-            logger.info(f"Successfully wrote {len(posts)} posts to log")
-            
-        except Exception as e:
-            logger.error(f"Error writing posts log: {str(e)}")
-            raise Exception(f"Failed to write posts log: {str(e)}")
-
-
-def get_all_posts() -> List[Dict]:
+    try:
+        await asyncio.to_thread(lambda: get_post_store().replace_all(posts))
+        logger.info(f"Successfully wrote {len(posts)} posts to log")
+        
+    except Exception as e:
+        logger.error(f"Error writing posts log: {str(e)}")
+        raise Exception(f"Failed to write posts log: {str(e)}")
+
+
+async def get_all_posts() -> List[Dict]:
     """
     Get all posts from log, sorted by timestamp (newest first)
     
     Returns:
         List of posts sorted by timestamp descending
     """
-    posts = read_posts_log()
+    posts, _ = await asyncio.to_thread(lambda: get_post_store().query(limit=None))
+    return posts
+
+
+async def query_posts(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    topic: Optional[str] = None,
+    summary: bool = True
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of post history, newest first (served from the post index)
     
-    # Sort by timestamp, newest first
-    posts.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+    Args:
+        limit: Page size
+        cursor: next_cursor returned with the previous page
+        status: Filter by status
+        topic: Filter by topic (case-insensitive)
+        summary: Leave out full text and image payloads
+        
+    Returns:
+        (posts, next_cursor); next_cursor is None on the last page
+    """
+    return await asyncio.to_thread(
+        lambda: get_post_store().query(limit=limit, cursor=cursor, status=status, topic=topic, summary=summary)
+    )
+
+
+async def count_posts() -> int:
+    """
+    Number of posts in the log
+    """
+    return await asyncio.to_thread(lambda: get_post_store().count())
+
+
+async def compact_posts_log() -> int:
+    """
+    Drop deleted/superseded entries from the log file
     
-    return posts
+    Returns:
+        Number of bytes reclaimed
+    """
+    return await asyncio.to_thread(lambda: get_post_store().compact())
 
 
-def clear_posts_log() -> None:
+async def clear_posts_log() -> None:
     """
     Clear all posts from the log (useful for testing)
     """
-    with file_lock:
-        try:
-            with open(POSTS_LOG_FILE, 'w', encoding='utf-8') as f:
-                json.dump({'posts': []}, f, indent=2)
-            logger.info("Posts log cleared")
-        except Exception as e:
-            logger.error(f"Error clearing posts log: {str(e)}")
-            raise
\ No newline at end of file
+    try:
+        await asyncio.to_thread(lambda: get_post_store().replace_all([]))
+        logger.info("Posts log cleared")
+    except Exception as e:
+        logger.error(f"Error clearing posts log: {str(e)}")
+        raise
@@ -0,0 +1,102 @@
+"""
+Benchmark the fallback image renderer
+Compares the previous per-row PIL renderer with the vectorized NumPy renderer
+in app.gemini_client, for rendering only and for rendering + PNG encoding
+(each path with the encoder settings it ships with).
+
+Usage (from backend/):
+    python benchmarks/fallback_image_benchmark.py [iterations]
+"""
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFilter
+from app.gemini_client import (
+    FALLBACK_HEIGHT, FALLBACK_WIDTH, encode_fallback_png, render_fallback_pixels, select_fallback_theme
+)
+
+
+def legacy_render(colors, seed: int) -> Image.Image:
+    """The previous renderer: per-row gradient lines, PIL shapes, 100 vignette rectangles"""
+    width, height = FALLBACK_WIDTH, FALLBACK_HEIGHT
+    img = Image.new('RGB', (width, height), colors[0])
+    draw = ImageDraw.Draw(img)
+    
+    for y in range(height):
+        progress = y / height
+        if progress < 0.33:
+            t, c0, c1 = progress * 3, colors[0], colors[1]
+        elif progress < 0.66:
+            t, c0, c1 = (progress - 0.33) * 3, colors[1], colors[2]
+        else:
+            t, c0, c1 = (progress - 0.66) * 3, colors[2], colors[3]
+        fill = tuple(int(c0[i] + (c1[i] - c0[i]) * t) for i in range(3))
+        draw.line([(0, y), (width, y)], fill=fill)
+    
+    rng = random.Random(seed)
+    overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    overlay_draw = ImageDraw.Draw(overlay)
+    for _ in range(rng.randint(4, 7)):
+        size = rng.randint(150, 450)
+        x = rng.randint(-size // 2, width - size // 2)
+        y = rng.randint(-size // 2, height - size // 2)
+        overlay_draw.ellipse([x, y, x + size, y + size], fill=(255, 255, 255, rng.randint(10, 35)))
+    for _ in range(rng.randint(2, 5)):
+        w = rng.randint(120, 350)
+        h = rng.randint(120, 300)
+        x = rng.randint(-60, width - w + 60)
+        y = rng.randint(-60, height - h + 60)
+        overlay_draw.rectangle([x, y, x + w, y + h], fill=(255, 255, 255, rng.randint(8, 25)))
+    
+    img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
+    img = img.filter(ImageFilter.GaussianBlur(radius=2))
+    
+    vignette = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    vignette_draw = ImageDraw.Draw(vignette)
+    for i in range(100):
+        border = i * 3
+        vignette_draw.rectangle(
+            [border, border, width - border, height - border],
+            outline=(0, 0, 0, int(i * 0.8))
+        )
+    return Image.alpha_composite(img.convert('RGBA'), vignette).convert('RGB')
+
+
+def vectorized_render(colors, seed: int) -> Image.Image:
+    return Image.fromarray(render_fallback_pixels(colors, seed), mode="RGB")
+
+
+def legacy_encode(img: Image.Image) -> bytes:
+    buffered = BytesIO()
+    img.save(buffered, format="PNG", optimize=True, quality=95)
+    return buffered.getvalue()
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    _, colors = select_fallback_theme("AI in healthcare")
+    fn(colors, 0)  # Warm-up
+    
+    start = time.perf_counter()
+    for seed in range(iterations):
+        fn(colors, seed)
+    per_call_ms = (time.perf_counter() - start) / iterations * 1000
+    print(f"{label:<32} {per_call_ms:8.1f} ms")
+    return per_call_ms
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"Fallback image {FALLBACK_WIDTH}x{FALLBACK_HEIGHT}, {iterations} iterations\n")
+    
+    legacy = bench("legacy render", legacy_render, iterations)
+    vectorized = bench("vectorized render", vectorized_render, iterations)
+    print(f"{'speedup':<32} {legacy / vectorized:8.1f}x\n")
+    
+    legacy_total = bench("legacy render + PNG", lambda c, s: legacy_encode(legacy_render(c, s)), iterations)
+    vectorized_total = bench("vectorized render + PNG", lambda c, s: encode_fallback_png(render_fallback_pixels(c, s)), iterations)
+    print(f"{'speedup':<32} {legacy_total / vectorized_total:8.1f}x")
@@ -0,0 +1,73 @@
+"""
+Tests for refresh token rotation
+"""
+import asyncio
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException, Response
+from mongomock_motor import AsyncMongoMockClient
+from app.auth import service
+from app.auth.routes import login, refresh_token
+from app.auth.schemas import LoginRequest
+from app.auth.service import auth_service
+from app.auth.user_cache import user_cache
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    monkeypatch.setattr(service, "AsyncIOMotorClient", AsyncMongoMockClient)
+    monkeypatch.setattr(auth_service, "client", None)
+
+    async def setup():
+        await auth_service.connect_db()
+        user = await auth_service.create_user("Ada", "ada@example.com", "secret123")
+        response = Response()
+        await login(LoginRequest(email="ada@example.com", password="secret123"), response)
+        return str(user.id), refresh_cookie(response)
+
+    return asyncio.run(setup())
+
+
+def refresh_cookie(response: Response) -> str:
+    return response.headers["set-cookie"].split("refresh_token=")[1].split(";")[0]
+
+
+def test_refresh_returns_current_plan_and_avatar(auth):
+    user_id, cookie = auth
+
+    async def main():
+        # Plan and avatar are changed outside the profile endpoint (e.g. billing)
+        await auth_service.users_collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"plan": "pro", "avatar_url": "https://example.com/ada.png"}}
+        )
+        user_cache.invalidate(user_id)
+        return await refresh_token(Response(), cookie)
+
+    result = asyncio.run(main())
+    assert result.user["plan"] == "pro"
+    assert result.user["avatar_url"] == "https://example.com/ada.png"
+
+
+def test_refresh_returns_updated_profile(auth):
+    user_id, cookie = auth
+
+    async def main():
+        await auth_service.update_user_profile(user_id, name="Ada L.")
+        return await refresh_token(Response(), cookie)
+
+    assert asyncio.run(main()).user["name"] == "Ada L."
+
+
+def test_token_can_only_be_rotated_once(auth):
+    _, cookie = auth
+
+    async def main():
+        return await asyncio.gather(
+            refresh_token(Response(), cookie),
+            refresh_token(Response(), cookie),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert sum(isinstance(result, HTTPException) and result.status_code == 401 for result in results) == 1
@@ -0,0 +1,84 @@
+"""
+Tests for resumable batch generation and its job files
+"""
+import asyncio
+import json
+import os
+import time
+import pytest
+from fastapi import HTTPException
+from app.config import settings
+from app.api import generate_batch
+from app.api.generate_topic import TopicGenerateRequest
+
+
+@pytest.fixture
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_JOBS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def fake_generator(monkeypatch, failing=()):
+    async def generate_item(index, item, requester):
+        success = item.topic not in failing
+        return {
+            "type": "item", "index": index, "topic": item.topic, "success": success,
+            "content": f"post about {item.topic}" if success else None,
+            "provider": "ollama", "error": None if success else "AI generation failed"
+        }
+    monkeypatch.setattr(generate_batch, "_generate_item", generate_item)
+
+
+def run_batch(topics, job_id=None):
+    async def main():
+        request = generate_batch.BatchGenerateRequest(
+            items=[TopicGenerateRequest(topic=topic) for topic in topics],
+            job_id=job_id
+        )
+        response = await generate_batch.generate_batch(request, "tester")
+        return [json.loads(line) async for line in response.body_iterator]
+    return asyncio.run(main())
+
+
+def test_completed_batch_deletes_job_file(jobs_dir, monkeypatch):
+    fake_generator(monkeypatch)
+    lines = run_batch(["remote work", "team culture"])
+
+    assert lines[-1]["succeeded"] == 2
+    assert list(jobs_dir.iterdir()) == []
+
+
+def test_failed_items_are_retried_on_resume(jobs_dir, monkeypatch):
+    fake_generator(monkeypatch, failing={"team culture"})
+    lines = run_batch(["remote work", "team culture"])
+    job_id = lines[0]["job_id"]
+    assert lines[-1]["failed"] == 1
+    assert (jobs_dir / f"{job_id}.jsonl").exists()
+
+    fake_generator(monkeypatch)
+    lines = run_batch(["remote work", "team culture"], job_id)
+    assert lines[0]["resumed"] == 1
+    assert lines[-1] == {"type": "done", "job_id": job_id, "succeeded": 2, "failed": 0}
+    assert not (jobs_dir / f"{job_id}.jsonl").exists()
+
+
+def test_resume_with_different_items_is_rejected(jobs_dir, monkeypatch):
+    fake_generator(monkeypatch, failing={"team culture"})
+    job_id = run_batch(["remote work", "team culture"])[0]["job_id"]
+
+    with pytest.raises(HTTPException) as error:
+        run_batch(["hiring", "team culture"], job_id)
+    assert error.value.status_code == 409
+
+
+def test_expire_batch_jobs_removes_only_old_files(jobs_dir):
+    old = jobs_dir / ("a" * 32 + ".jsonl")
+    recent = jobs_dir / ("b" * 32 + ".jsonl")
+    old.write_text("{}\n")
+    recent.write_text("{}\n")
+    week_ago = time.time() - 8 * 24 * 3600
+    os.utime(old, (week_ago, week_ago))
+
+    assert generate_batch.expire_batch_jobs() == 1
+    assert not old.exists()
+    assert recent.exists()
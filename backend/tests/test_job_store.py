@@ -0,0 +1,90 @@
+"""
+Tests for job claiming and lease-based recovery across processes
+(two JobStore connections to one file stand in for two workers)
+"""
+import sqlite3
+import time
+import pytest
+from app.services.job_store import JobStore, STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = JobStore(path), JobStore(path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_job_is_claimed_only_once(stores):
+    first, second = stores
+    job, _ = first.create("generate", {"topic": "remote work"})
+
+    assert first.mark_running(job["id"], "worker-a", 60)
+    assert not second.mark_running(job["id"], "worker-b", 60)
+    assert first.get(job["id"])["attempts"] == 1
+
+
+def test_recovery_leaves_leased_jobs_alone(stores):
+    first, second = stores
+    job, _ = first.create("generate", {"topic": "remote work"})
+    first.mark_running(job["id"], "worker-a", 60)
+
+    # Another worker restarting must not requeue a job that is still held
+    assert second.recover_interrupted(max_attempts=3) == []
+    assert second.get(job["id"])["status"] == STATUS_RUNNING
+
+
+def test_recovery_requeues_expired_leases(stores):
+    first, second = stores
+    job, _ = first.create("generate", {"topic": "remote work"})
+    first.mark_running(job["id"], "worker-a", 0.01)
+    time.sleep(0.02)
+
+    assert second.recover_interrupted(max_attempts=3) == [job["id"]]
+    assert second.mark_running(job["id"], "worker-b", 60)
+    # The worker that lost the job can no longer overwrite it
+    assert not first.update(job["id"], "worker-a", status=STATUS_FAILED, error="late")
+    assert second.get(job["id"])["status"] == STATUS_RUNNING
+
+
+def test_renewed_lease_survives_recovery(stores):
+    first, second = stores
+    job, _ = first.create("generate", {"topic": "remote work"})
+    first.mark_running(job["id"], "worker-a", 0.01)
+    assert first.renew_leases("worker-a", 60) == 1
+    time.sleep(0.02)
+
+    assert second.recover_interrupted(max_attempts=3) == []
+
+
+def test_release_requeues_own_jobs(stores):
+    first, _ = stores
+    job, _ = first.create("generate", {"topic": "remote work"})
+    first.mark_running(job["id"], "worker-a", 60)
+
+    assert first.release("worker-a") == 1
+    assert first.get(job["id"])["status"] == STATUS_QUEUED
+
+
+def test_store_without_lease_columns_is_upgraded(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL,
+           dedupe_key TEXT NOT NULL, status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0,
+           message TEXT, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,
+           created_at REAL NOT NULL, updated_at REAL NOT NULL)"""
+    )
+    conn.execute(
+        "INSERT INTO jobs (id, kind, params, dedupe_key, status, attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ("old", "generate", "{}", "key", STATUS_RUNNING, 1, 0, 0)
+    )
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    # A job left running without a lease belongs to no live process
+    assert store.recover_interrupted(max_attempts=3) == ["old"]
+    store.close()
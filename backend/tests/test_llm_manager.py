@@ -0,0 +1,75 @@
+"""
+Tests for LLMManager caching and coalescing, and the chat sessions they feed
+"""
+import asyncio
+import pytest
+from app.api import edit_actions
+from app.services.chat_sessions import ChatSessionStore
+from app.services.llm_manager import LLMManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = LLMManager()
+    calls = []
+
+    async def generate(prompt, system, priority, user_id, max_tokens=None, ollama_messages=None):
+        calls.append(ollama_messages)
+        await asyncio.sleep(0.01)
+        return f"answer {len(calls)}", "ollama"
+
+    monkeypatch.setattr(manager, "_generate", generate)
+    manager.calls = calls
+    return manager
+
+
+def test_cached_answer_is_not_fresh(manager):
+    async def main():
+        first = await manager.generate("Fix this", system="editor", cache=True)
+        second = await manager.generate("Fix this", system="editor", cache=True)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == ("answer 1", "ollama", True)
+    assert second == ("answer 1", "ollama", False)
+    assert len(manager.calls) == 1
+
+
+def test_joined_request_is_not_fresh(manager):
+    async def main():
+        return await asyncio.gather(
+            manager.generate("Write a post", system="writer"),
+            manager.generate("Write a post", system="writer")
+        )
+
+    results = asyncio.run(main())
+    assert sorted(fresh for _, _, fresh in results) == [False, True]
+    assert len(manager.calls) == 1
+
+
+def test_chat_history_is_part_of_the_key(manager):
+    history = [{"role": "system", "content": "editor"}, {"role": "user", "content": "Fix this"}]
+
+    async def main():
+        await manager.generate("Fix this", system="editor", cache=True)
+        return await manager.generate("Fix this", system="editor", cache=True, ollama_messages=history)
+
+    assert asyncio.run(main())[2] is True
+    assert manager.calls == [None, history]
+
+
+def test_edit_served_from_cache_does_not_continue_session(manager, monkeypatch):
+    sessions = ChatSessionStore(max_sessions=10, ttl=60, max_turns=5)
+    monkeypatch.setattr(edit_actions, "llm_manager", manager)
+    monkeypatch.setattr(edit_actions, "chat_sessions", sessions)
+    request = edit_actions.EditRequest(content="Teh post")
+
+    async def edit(user):
+        return await edit_actions._run_edit("fix-grammar", request, user, "Fixed grammar", "Fix grammar")
+
+    asyncio.run(edit("alice"))
+    asyncio.run(edit("bob"))
+
+    assert sessions.stats()["started"] == 1
+    assert sessions.continuation("bob", "answer 1", edit_actions.EDITOR_SYSTEM, "Shorter", 500) is None
+    assert sessions.continuation("alice", "answer 1", edit_actions.EDITOR_SYSTEM, "Shorter", 500) is not None
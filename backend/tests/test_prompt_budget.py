@@ -0,0 +1,100 @@
+"""
+Tests for prompt token estimates and output limits, including non-English posts
+"""
+import asyncio
+import pytest
+from app.config import settings
+from app.services.prompt_budget import (
+    PromptTooLargeError, estimate_tokens, fit_output_limit, trim_to_tokens
+)
+from app.api import rewrite
+from app.api.edit_actions import EDIT_TEMPLATES, EditRequest, build_edit_prompt, edit_max_tokens
+from app.schemas.post_schemas import ActionType, RewriteRequest
+
+SPANISH = "La transformación digital no es una opción, es una necesidad. Nuestro equipo aprendió muchísimo este año. "
+HINDI = "नेतृत्व पदों के बारे में नहीं है, यह प्रभाव के बारे में है। हमारी टीम हर दिन कुछ नया सीखती है। "
+CHINESE = "领导力不是头衔，而是影响力。我们的团队每天都在学习新的东西，并为客户创造价值。"
+ENGLISH = "Leadership is not about titles, it's about impact. Every day our team ships something that matters. "
+
+
+def post(sentence: str, chars: int) -> str:
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+
+def test_accented_words_are_not_split_per_character():
+    # About one token per 3 letters, like English; not 3 tokens per accent
+    assert estimate_tokens("transformación") <= 6
+    assert estimate_tokens(post(SPANISH, 5000)) < 2000
+
+
+def test_per_script_estimates():
+    assert estimate_tokens(post(HINDI, 1500)) < 1200
+    assert estimate_tokens(post(CHINESE, 800)) < 1300
+    # Emojis still count several tokens each (byte fallback)
+    assert estimate_tokens("🚀🎉💡") == 9
+
+
+@pytest.mark.parametrize("sentence, chars", [
+    (SPANISH, 5000),
+    (HINDI, 1500),
+    (CHINESE, 800),
+    (ENGLISH, 5000),
+])
+@pytest.mark.parametrize("action", sorted(EDIT_TEMPLATES))
+def test_valid_posts_fit_with_room_for_the_answer(sentence, chars, action):
+    request = EditRequest(content=post(sentence, chars))
+    max_tokens = edit_max_tokens(action, request)
+    prompt, template = build_edit_prompt(action, request, max_tokens)
+
+    # Never less than the post itself, never beyond the context window
+    assert max_tokens >= estimate_tokens(request.content)
+    assert estimate_tokens(f"{template.system}\n\n{prompt}") + max_tokens <= settings.OLLAMA_CONTEXT_TOKENS
+
+
+def test_output_limit_is_capped_at_the_context_left():
+    request = EditRequest(content=post(CHINESE, 2000))
+    max_tokens = edit_max_tokens("expand", request)
+    template = EDIT_TEMPLATES["expand"]
+    prompt_tokens = estimate_tokens(f"{template.system}\n\n{template.render(content=request.content)}")
+
+    assert max_tokens == settings.OLLAMA_CONTEXT_TOKENS - prompt_tokens
+
+
+def test_text_that_cannot_fit_is_rejected():
+    request = EditRequest(content=post(CHINESE, 5000))
+    with pytest.raises(PromptTooLargeError) as error:
+        edit_max_tokens("fix-grammar", request)
+    assert error.value.status_code == 413
+
+
+def test_fit_output_limit_keeps_smaller_limits():
+    assert fit_output_limit("short prompt", 500, 100) == 500
+
+
+def test_trim_keeps_whole_words_in_other_scripts():
+    trimmed = trim_to_tokens(post(HINDI, 600), 50)
+    assert trimmed.endswith(" [...]")
+    assert HINDI.startswith(trimmed[:-len(" [...]")].rstrip())
+
+
+@pytest.mark.parametrize("sentence, chars", [(SPANISH, 5000), (HINDI, 1500), (CHINESE, 800)])
+def test_rewrite_accepts_non_english_posts(monkeypatch, sentence, chars):
+    calls = []
+
+    async def generate(**kwargs):
+        calls.append(kwargs)
+        return "rewritten", "ollama", True
+
+    monkeypatch.setattr(rewrite.llm_manager, "generate", generate)
+    text = post(sentence, chars)
+    response = asyncio.run(rewrite.rewrite_post(RewriteRequest(text=text, action=ActionType.MAKE_LONGER), "user"))
+
+    assert response.text == "rewritten"
+    prompt_tokens = estimate_tokens(f"{calls[0]['system']}\n\n{calls[0]['prompt']}")
+    assert prompt_tokens + calls[0]["max_tokens"] <= settings.OLLAMA_CONTEXT_TOKENS
+
+
+def test_rewrite_rejects_text_that_cannot_fit():
+    request = RewriteRequest(text=post(CHINESE, 5000), action=ActionType.IMPROVE)
+    with pytest.raises(PromptTooLargeError):
+        asyncio.run(rewrite.rewrite_post(request, "user"))
@@ -0,0 +1,58 @@
+"""
+Tests for single-flight request coalescing
+"""
+import asyncio
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_caller_after_cancellation_starts_fresh_call():
+    flight = SingleFlight()
+    started = []
+
+    async def work():
+        started.append(1)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            # Cleanup that keeps the cancelled task alive for a moment
+            await asyncio.sleep(0.05)
+            raise
+        return "stale"
+
+    async def fresh():
+        started.append(2)
+        return "fresh"
+
+    async def main():
+        first = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()  # last waiter leaves: the shared task is cancelled
+        await asyncio.sleep(0)
+
+        # The cancelled task is still running its cleanup
+        result = await flight.do("key", fresh)
+        try:
+            await first
+        except asyncio.CancelledError:
+            pass
+        return result
+
+    assert asyncio.run(main()) == "fresh"
+    assert started == [1, 2]